@@ -0,0 +1,467 @@
+"""
+Benchmarks for the dashboard's per-rerun hot paths.
+
+Each benchmark runs over synthetic catalogues or PGN corpora of growing size
+and reports the best and median wall time of several repeats. Results are
+written as JSON so they can be kept as a baseline and compared later:
+
+    python -m benchmarks.run --output benchmarks/results/baseline.json
+    python -m benchmarks.run --compare benchmarks/results/baseline.json
+
+`--compare` exits with status 1 if any benchmark is slower than the baseline
+by more than `--tolerance`. `--quick` uses the smallest sizes only.
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import chess  # noqa: E402
+
+from benchmarks.synthetic import make_catalogue, make_pgn  # noqa: E402
+
+BENCHMARKS = []
+CATALOGUE_SIZES = [100, 1000, 10000]
+GAME_COUNTS = [100, 1000, 5000]
+PLY_COUNTS = [50, 200, 800]
+APP_SIZES = [1000, 10000, 50000]  # catalogue rows behind the end-to-end dashboard runs
+
+
+def benchmark(name, sizes, repeat=5):
+    """Registers `setup(size) -> callable`; only the returned callable is timed."""
+    def register(setup):
+        BENCHMARKS.append({"name": name, "sizes": sizes, "repeat": repeat, "setup": setup})
+        return setup
+    return register
+
+
+# --- Catalogue load -----------------------------------------------------------
+
+@benchmark("catalogue.csv_parse_and_replay", CATALOGUE_SIZES, repeat=3)
+def bench_csv_parse(size):
+    """The original load path: read the CSV, then replay every line's SAN."""
+    import pandas as pd
+    from openings.index import OpeningIndex
+    path = _catalogue_csv(size)
+    return lambda: OpeningIndex.from_dataframe(pd.read_csv(path))
+
+
+@benchmark("catalogue.binary_cold_load", CATALOGUE_SIZES, repeat=3)
+def bench_binary_load(size):
+    from openings.catalogue import open_catalogue
+    path = _catalogue_csv(size)
+    open_catalogue(path)  # build once; only the memory-mapped load is timed
+
+    def run():
+        catalogue = open_catalogue(path)
+        catalogue.frame()
+        catalogue.opening_index()
+    return run
+
+
+@benchmark("catalogue.validate", CATALOGUE_SIZES, repeat=3)
+def bench_validate(size):
+    """Offline validation and normalisation of every line, in this process."""
+    from openings.validate import validate_catalogue
+    df = _catalogue(size)
+    return lambda: validate_catalogue(df, workers=1)
+
+
+# --- Filters ------------------------------------------------------------------
+
+@benchmark("filter.name_str_contains", CATALOGUE_SIZES)
+def bench_name_pandas(size):
+    df = _catalogue(size)
+    return lambda: df[df["Name"].str.contains("gambit", case=False, na=False)]
+
+
+@benchmark("filter.name_indexed", CATALOGUE_SIZES)
+def bench_name_indexed(size):
+    search = _search(size)
+    return lambda: search.by_name("gambit")
+
+
+@benchmark("filter.eco_indexed", CATALOGUE_SIZES)
+def bench_eco_indexed(size):
+    search = _search(size)
+    return lambda: search.search(eco="B", name_query="def")
+
+
+# --- Boards -------------------------------------------------------------------
+
+@benchmark("opening.step_through_line", CATALOGUE_SIZES)
+def bench_opening_steps(size):
+    """Board positions for every ply of every line, as the Next/Previous buttons produce them."""
+    index = _index(size)
+
+    def run():
+        for line in index.lines:
+            for ply in range(len(line) + 1):
+                line.board_at(ply)
+    return run
+
+
+@benchmark("interactive.replay_from_start", PLY_COUNTS, repeat=3)
+def bench_replay(size):
+    """The original navigation: rebuild the board from move 0 on every click."""
+    sans = _game_sans(size)
+
+    def run():
+        for target in range(len(sans) + 1):
+            board = chess.Board()
+            for san in sans[:target]:
+                board.push_san(san)
+    return run
+
+
+@benchmark("interactive.cursor_navigation", PLY_COUNTS)
+def bench_cursor(size):
+    from openings.history import MoveHistory
+    history = MoveHistory()
+    for san in _game_sans(size):
+        history.push_san(san)
+    targets = random.Random(1).choices(range(len(history) + 1), k=100)
+
+    def run():
+        history.rewind()
+        while not history.at_end:
+            history.forward()
+        while history.cursor:
+            history.back()
+        for target in targets:
+            history.jump(target)
+    return run
+
+
+@benchmark("render.svg_uncached", [1], repeat=20)
+def bench_svg_uncached(size):
+    import chess.svg
+    board = chess.Board("r1bqkbnr/pppp1ppp/2n5/1B2p3/4P3/5N2/PPPP1PPP/RNBQK2R b KQkq - 3 3")
+    return lambda: chess.svg.board(board=board)
+
+
+@benchmark("render.svg_cached", [1], repeat=20)
+def bench_svg_cached(size):
+    from openings.render import SvgRenderCache
+    cache = SvgRenderCache()
+    board = chess.Board("r1bqkbnr/pppp1ppp/2n5/1B2p3/4P3/5N2/PPPP1PPP/RNBQK2R b KQkq - 3 3")
+    cache.render(board)
+    return lambda: cache.render(board)
+
+
+@benchmark("export.pgn_rebuild", PLY_COUNTS, repeat=3)
+def bench_pgn_rebuild(size):
+    """The original download data: a fresh chess.pgn.Game serialised after every move."""
+    from openings.export import game_from_moves
+    moves = _game_moves(size)
+
+    def run():
+        for ply in range(1, len(moves) + 1):
+            str(game_from_moves(moves[:ply]))
+    return run
+
+
+@benchmark("export.pgn_incremental", PLY_COUNTS, repeat=3)
+def bench_pgn_incremental(size):
+    from openings.export import IncrementalPgn
+    from openings.history import MoveHistory
+    moves = _game_moves(size)
+
+    def run():
+        history, pgn = MoveHistory(), IncrementalPgn()
+        for move in moves:
+            history.push(move)
+            pgn.render(history, {})
+    return run
+
+
+@benchmark("explorer.continuations", [1000], repeat=20)
+def bench_explorer(size):
+    """Continuations of the position after 1. e4 with the statistics of 1000 uploaded games."""
+    from openings.explorer import OpeningExplorer
+    from openings.ingest import ingest_pgn
+    report = ingest_pgn(io.BytesIO(_pgn(size)), _classifier(1000), _catalogue(1000), explorer_plies=16)
+    explorer = OpeningExplorer(_index(1000), report.tree)
+    board = chess.Board()
+    board.push_san("e4")
+    return lambda: explorer.continuations(board)
+
+
+# --- PGN upload ---------------------------------------------------------------
+
+@benchmark("pgn.read_all_games", GAME_COUNTS, repeat=3)
+def bench_pgn_read(size):
+    """Full python-chess game parsing, the cost the original uploader paid per game."""
+    import chess.pgn
+    data = _pgn(size)
+
+    def run():
+        handle = io.StringIO(data.decode("utf-8"))
+        while chess.pgn.read_game(handle) is not None:
+            pass
+    return run
+
+
+@benchmark("pgn.streaming_classify", GAME_COUNTS, repeat=3)
+def bench_pgn_ingest(size):
+    from openings.ingest import ingest_pgn
+    data = _pgn(size)
+    classifier, df = _classifier(1000), _catalogue(1000)
+    return lambda: ingest_pgn(io.BytesIO(data), classifier, df)
+
+
+@benchmark("pgn.parallel_classify", GAME_COUNTS, repeat=3)
+def bench_pgn_parallel(size):
+    """The same corpus through ParallelPgnAnalyser's process pool (workers started before timing)."""
+    from openings.catalogue import open_catalogue
+    from openings.parallel import ParallelPgnAnalyser
+    csv_path = _catalogue_csv(1000)
+    open_catalogue(csv_path)  # workers load the compiled catalogue
+    path = os.path.join(_workdir, f"games_{size}.pgn")
+    with open(path, "wb") as handle:
+        handle.write(_pgn(size))
+    analyser = _memo(("analyser",), lambda: ParallelPgnAnalyser(csv_path))
+    analyser.analyse(path)
+    return lambda: analyser.analyse(path)
+
+
+# --- Sidebar ------------------------------------------------------------------
+
+@benchmark("sidebar.value_counts_and_gambits", CATALOGUE_SIZES)
+def bench_sidebar(size):
+    df = _catalogue(size)
+
+    def run():
+        df["ECO"].value_counts()
+        df[df["Name"].str.contains("Gambit", case=False, na=False)].shape[0]
+    return run
+
+
+@benchmark("sidebar.precomputed_summary", CATALOGUE_SIZES)
+def bench_sidebar_stats(size):
+    """A filtered view's sidebar tables from the per-row codes (memoisation bypassed)."""
+    from openings.stats import OpeningStats
+    stats = OpeningStats(_catalogue(size), _index(size))
+    rows, _ = _search(size).search(eco="B")
+    return lambda: stats.summary(rows)
+
+
+@benchmark("sidebar.memoised_summary", CATALOGUE_SIZES)
+def bench_sidebar_rerun(size):
+    """The same view on a rerun with unchanged filters."""
+    from openings.stats import OpeningStats
+    stats = OpeningStats(_catalogue(size), _index(size))
+    rows, _ = _search(size).search(eco="B")
+    return lambda: stats.summary(rows, key=("B", "", ""))
+
+
+# --- End to end ---------------------------------------------------------------
+
+@benchmark("app.first_run", APP_SIZES, repeat=3)
+def bench_app_first_run(size):
+    """Cold script run of dashboard.py in Streamlit's AppTest harness (caches cleared, catalogue compiled)."""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    def run():
+        st.cache_data.clear()
+        st.cache_resource.clear()
+        AppTest.from_file(os.path.join(ROOT, "dashboard.py"), default_timeout=300).run()
+    return _in_app_dir(size, run)
+
+
+@benchmark("app.rerun", APP_SIZES, repeat=10)
+def bench_app_rerun(size):
+    """Warm rerun latency: the cost of any widget interaction."""
+    from streamlit.testing.v1 import AppTest
+    app = AppTest.from_file(os.path.join(ROOT, "dashboard.py"), default_timeout=300)
+    _in_app_dir(size, app.run)()
+    return _in_app_dir(size, app.run)
+
+
+# --- Fixtures (memoised per process) --------------------------------------------
+
+_fixtures = {}
+_workdir = None
+
+
+def _memo(key, build):
+    if key not in _fixtures:
+        _fixtures[key] = build()
+    return _fixtures[key]
+
+
+def _catalogue(size):
+    return _memo(("catalogue", size), lambda: make_catalogue(size, seed=size))
+
+
+def _catalogue_csv(size):
+    def write():
+        path = os.path.join(_workdir, f"catalogue_{size}.csv")
+        _catalogue(size).to_csv(path, index=False)
+        return path
+    return _memo(("csv", size), write)
+
+
+def _in_app_dir(size, func):
+    """`func` run from a directory whose chess_openings.csv (compiled) is a synthetic catalogue of `size` rows."""
+    def build():
+        from openings.catalogue import DEFAULT_CSV, open_catalogue
+        directory = os.path.join(_workdir, f"app_{size}")
+        os.makedirs(directory)
+        _catalogue(size).to_csv(os.path.join(directory, DEFAULT_CSV), index=False)
+        open_catalogue(os.path.join(directory, DEFAULT_CSV))
+        return directory
+    directory = _memo(("app", size), build)
+
+    def run():
+        cwd = os.getcwd()
+        os.chdir(directory)  # dashboard.py loads chess_openings.csv relative to the working directory
+        try:
+            return func()
+        finally:
+            os.chdir(cwd)
+    return run
+
+
+def _index(size):
+    from openings.index import OpeningIndex
+    return _memo(("index", size), lambda: OpeningIndex.from_dataframe(_catalogue(size)))
+
+
+def _search(size):
+    from openings.search import OpeningSearch
+    return _memo(("search", size), lambda: OpeningSearch(_catalogue(size), _index(size)))
+
+
+def _classifier(size):
+    from openings.classifier import OpeningClassifier
+    return _memo(("classifier", size), lambda: OpeningClassifier(_index(size)))
+
+
+def _pgn(games):
+    return _memo(("pgn", games), lambda: make_pgn(games, seed=games, catalogue=_catalogue(1000)))
+
+
+def _game_sans(plies):
+    def build():
+        import chess.pgn
+        rng = random.Random(plies)
+        board, sans = chess.Board(), []
+        while len(sans) < plies:
+            legal = list(board.legal_moves)
+            if not legal:
+                board, sans = chess.Board(), []
+                continue
+            move = rng.choice(legal)
+            sans.append(board.san(move))
+            board.push(move)
+        return sans
+    return _memo(("sans", plies), build)
+
+
+def _game_moves(plies):
+    def build():
+        board = chess.Board()
+        return [board.push_san(san) for san in _game_sans(plies)]
+    return _memo(("moves", plies), build)
+
+
+# --- Runner -------------------------------------------------------------------
+
+def run_benchmarks(selected=None, quick=False, verbose=True):
+    results = []
+    for bench in BENCHMARKS:
+        if selected and not any(pattern in bench["name"] for pattern in selected):
+            continue
+        for size in bench["sizes"][:1] if quick else bench["sizes"]:
+            func = bench["setup"](size)
+            timings = []
+            for _ in range(bench["repeat"]):
+                start = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - start)
+            result = {
+                "name": bench["name"],
+                "size": size,
+                "repeat": bench["repeat"],
+                "min": min(timings),
+                "median": statistics.median(timings),
+            }
+            results.append(result)
+            if verbose:
+                print(f"{bench['name']:<38} {size:>7}  min {result['min'] * 1000:10.3f} ms"
+                      f"  median {result['median'] * 1000:10.3f} ms", flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Prints the ratio to the baseline for every shared benchmark; returns the regressions."""
+    previous = {(entry["name"], entry["size"]): entry for entry in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get((result["name"], result["size"]))
+        if not before:
+            continue
+        ratio = result["min"] / before["min"] if before["min"] else float("inf")
+        flag = "  REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"{result['name']:<38} {result['size']:>7}  x{ratio:6.2f}{flag}")
+        if flag:
+            regressions.append(result)
+    return regressions
+
+
+def main(argv=None):
+    global _workdir
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs. baseline (default: %(default)s)")
+    parser.add_argument("--quick", action="store_true", help="smallest size of each benchmark only")
+    parser.add_argument("-k", dest="selected", action="append", help="only benchmarks whose name contains this")
+    args = parser.parse_args(argv)
+
+    _workdir = tempfile.mkdtemp(prefix="openings-bench-")
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        results = run_benchmarks(args.selected, args.quick)
+    finally:
+        os.chdir(cwd)
+        if ("analyser",) in _fixtures:
+            _fixtures.pop(("analyser",)).shutdown()
+        shutil.rmtree(_workdir, ignore_errors=True)
+
+    report = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "chess": chess.__version__,
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            if compare(results, json.load(handle), args.tolerance):
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Deterministic synthetic inputs for the benchmarks: opening catalogues and PGN
+corpora of any size, generated from seeded random walks over legal moves.
+"""
+import io
+import random
+
+import chess
+import chess.pgn
+import pandas as pd
+
+WORDS = ["King's", "Queen's", "Sicilian", "French", "Indian", "Dutch", "English", "Italian", "Russian",
+         "Slav", "Modern", "Classical", "Closed", "Open", "Accelerated", "Hungarian", "Nimzo", "Benoni"]
+KINDS = ["Defense", "Opening", "Game", "Attack", "Variation", "Gambit", "System"]
+RESULTS = ["1-0", "0-1", "1/2-1/2"]
+UNIQUE_GAMES = 500  # corpora larger than this repeat their games cyclically
+
+
+def random_line(rng, min_plies, max_plies, board=None):
+    board = board or chess.Board()
+    moves = []
+    for _ in range(rng.randint(min_plies, max_plies)):
+        legal = list(board.legal_moves)
+        if not legal:
+            break
+        move = rng.choice(legal)
+        moves.append(board.san(move))
+        board.push(move)
+    return moves
+
+
+def format_moves(sans):
+    return " ".join(f"{i // 2 + 1}. {san}" if i % 2 == 0 else san for i, san in enumerate(sans))
+
+
+def make_catalogue(rows, seed=0):
+    """DataFrame with the columns of chess_openings.csv and `rows` random but legal lines."""
+    rng = random.Random(seed)
+    records = []
+    for _ in range(rows):
+        name = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(KINDS)}"
+        records.append({
+            "ECO": f"{rng.choice('ABCDE')}{rng.randint(0, 99):02d}",
+            "Name": name,
+            "Moves": format_moves(random_line(rng, 1, 16)),
+            "Description": f"Synthetic line {len(records)} for benchmarking.",
+        })
+    return pd.DataFrame(records, columns=["ECO", "Name", "Moves", "Description"])
+
+
+def make_pgn(games, seed=0, catalogue=None):
+    """PGN bytes with `games` games; when a catalogue is given, games start from its lines."""
+    rng = random.Random(seed)
+    prefixes = catalogue["Moves"].tolist() if catalogue is not None else [""]
+    texts = []
+    for i in range(min(games, UNIQUE_GAMES)):
+        game = chess.pgn.Game()
+        game.headers["Event"] = "Synthetic"
+        game.headers["Round"] = str(i + 1)
+        game.headers["Result"] = rng.choice(RESULTS)
+        board = chess.Board()
+        node = game
+        for token in prefixes[rng.randrange(len(prefixes))].split():
+            if not token[0].isdigit():
+                node = node.add_variation(board.push_san(token))
+        for san in random_line(rng, 10, 70, board.copy()):
+            node = node.add_variation(board.push_san(san))
+        texts.append(str(game))
+    out = io.StringIO()
+    for i in range(games):
+        out.write(texts[i % len(texts)])
+        out.write("\n\n")
+    return out.getvalue().encode("utf-8")
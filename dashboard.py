@@ -1,10 +1,34 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import pandas as pd
 import chess
-import chess.svg
-import chess.pgn
-import datetime
+import chess.engine
+import concurrent.futures
+import hashlib
 import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from array import array
+
+from openings.cache import DEFAULT_MAX_BYTES, ArtefactCache, SqliteBackend, legal_moves_san
+from openings.catalogue import DEFAULT_CSV, build_catalogue, catalogue_is_current, open_catalogue
+from openings.classifier import OpeningClassifier
+from openings.engine import DEFAULT_CACHE_PATH, DEFAULT_DEPTH, DEFAULT_WORKERS, EnginePool, find_engine
+from openings.explorer import OpeningExplorer
+from openings.export import IncrementalPgn, export_classified_games, export_openings, interactive_headers
+from openings.history import MoveHistory
+from openings.index import OpeningIndex
+from openings.ingest import EXPLORER_PLIES, IngestReport, ingest_pgn, read_first_game
+from openings.instrumentation import MetricsRegistry, RerunProfiler
+from openings.jobs import CANCELLED, FAILED, JobManager
+from openings.parallel import PARALLEL_THRESHOLD_BYTES, ParallelPgnAnalyser
+from openings.render import SvgRenderCache
+from openings.search import OpeningSearch, narrow
+from openings.stats import OpeningStats
+from openings.table import DEFAULT_PAGE_SIZE, PAGE_SIZES, SORTABLE_COLUMNS, OpeningTable, page_count, paginate
 
 # Set page config (including dark theme if directly supported, or use custom CSS)
 # Streamlit's theming has evolved. Forcing a "dark" theme might be part of the theme object
@@ -17,6 +41,33 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Per-rerun section timings (see openings/instrumentation.py). The debug panel at the bottom of the
+# sidebar is shown only when the server runs with DASHBOARD_DEBUG=1: it can arm process-wide
+# cProfile/tracemalloc capture and start catalogue-wide jobs, so visitors cannot turn it on.
+debug_panel = os.environ.get("DASHBOARD_DEBUG") == "1"
+# A capturing run that ended early (st.stop, st.rerun or an exception) never reached profiler.finish()
+# at the bottom of the script, so its cProfile/tracemalloc capture is ended before this run starts its own.
+if 'debug_capturing_profiler' in st.session_state:
+    st.session_state.pop('debug_capturing_profiler').finish()
+profiler = RerunProfiler(
+    profile=debug_panel and st.session_state.get("debug_profile_runs", False),
+    trace_memory=debug_panel and st.session_state.get("debug_trace_memory", False))
+if profiler.capturing:
+    st.session_state.debug_capturing_profiler = profiler
+
+# Aggregated timings of every session's runs, for the debug panel and metrics export
+METRICS_FILE_INTERVAL = 15  # seconds between two writes of DASHBOARD_METRICS_FILE
+@st.cache_resource
+def get_metrics_registry():
+    return MetricsRegistry()
+
+# Background jobs (upload analysis, catalogue builds) shared by every session of the server process
+@st.cache_resource
+def get_job_manager():
+    return JobManager()
+
+job_manager = get_job_manager()
+
 # Custom CSS for modern look and feel
 custom_css = """
 <style>
@@ -140,9 +191,12 @@ with st.expander("ℹ️ How to Use This Dashboard (Beginner's Guide)", expanded
         *   Select an ECO code (e.g., "A00", "B20") to narrow down the list. Select "All" to see all openings.
     *   **Searching by Name:**
         *   Use the "🔍 Search by Name" text box on the right to find openings containing specific words (e.g., "King's Gambit", "Sicilian").
+        *   Matching ignores case and accents ("reti" finds "Réti Opening"). If no name contains your text, the closest names are shown instead.
         *   The table will update as you type.
+    *   **Searching by Moves:**
+        *   Type a move sequence (e.g., "1. d4 Nf6 2. c4") in "♟️ Search by Moves" to list the openings that pass through the resulting position, whatever the move order.
     *   **Understanding the Openings Table:**
-        *   The main table displays a list of chess openings. Each row shows:
+        *   The main table displays one page of the matching openings; use "Sort by", "Rows per page" and "Page" above it to move through the list. Each row shows its `ID` and:
             *   `ECO`: The ECO code for the opening.
             *   `Name`: The common name of the opening.
             *   `Moves`: The sequence of moves in Standard Algebraic Notation (SAN).
@@ -151,8 +205,8 @@ with st.expander("ℹ️ How to Use This Dashboard (Beginner's Guide)", expanded
     **2. Viewing Opening Details and Moves:**
 
     *   **Selecting an Opening:**
-        *   Below the filters, you'll find a dropdown menu labeled "Select Opening to View Details:".
-        *   Choose an opening name from this list.
+        *   Below the table, you'll find a dropdown menu labeled "Select Opening to View Details:". It lists the openings on the current page of the table.
+        *   Type part of a name in "Find an opening to view" to list matching openings from the whole filtered set instead, then choose one. Each entry shows its ECO code and table `ID`, so openings that share a name can be told apart.
         *   Once selected, its detailed information (ECO, Name, Moves, Description) will appear.
     *   **Visualizing on the Chessboard:**
         *   After selecting an opening, a chessboard will show its starting position.
@@ -166,6 +220,8 @@ with st.expander("ℹ️ How to Use This Dashboard (Beginner's Guide)", expanded
     *   Here, you can input your own chess moves in the text box (e.g., "e4", "Nf3", "O-O" for castling).
     *   Click "▶️ Make Move" to see your move on the board.
     *   You can also navigate through the moves you've made using the "⏪ Previous Interactive Move" and "⏩ Next Interactive Move" buttons in this section.
+    *   The "Jump to move" slider goes straight to any move of the game. Making a move after going back starts a new line from that point.
+    *   The "Opening" line below the board names the deepest catalogue opening reached at the move you are viewing.
 
     **4. Summary Statistics:**
 
@@ -178,6 +234,7 @@ with st.expander("ℹ️ How to Use This Dashboard (Beginner's Guide)", expanded
         *   In the "Interactive Chessboard" section, click on "Browse files" under "⬆️ Upload PGN File".
         *   Select a PGN file (`.pgn`) from your computer.
         *   The game from the PGN file will be loaded onto the interactive chessboard, replacing any existing moves. You can then navigate through its moves.
+        *   If the file contains several games, the first one is loaded onto the board and every game is classified into the "📚 Openings in uploaded file" report (games, ECO codes and results).
     *   **Exporting a Game (⬇️ Download PGN):**
         *   After making moves on the "Interactive Chessboard", the "⬇️ Download PGN" button will appear.
         *   Click this button to save the sequence of moves you've played on the interactive board as a `.pgn` file to your computer.
@@ -187,36 +244,330 @@ with st.expander("ℹ️ How to Use This Dashboard (Beginner's Guide)", expanded
 st.divider()
 
 # Initialize session state variables if they don't exist
-if 'selected_opening_name_key' not in st.session_state:
-    st.session_state.selected_opening_name_key = ""
-if 'current_opening_moves' not in st.session_state:
-    st.session_state.current_opening_moves = []
+# Catalogue row ID chosen in the opening picker, and the row whose moves the detail board shows
+if 'selected_opening_row' not in st.session_state:
+    st.session_state.selected_opening_row = None
+if 'selected_opening_row_key' not in st.session_state:
+    st.session_state.selected_opening_row_key = None
+# Ply shown on the detail board; the line itself and its boards come from the shared opening index
 if 'current_move_index' not in st.session_state:
     st.session_state.current_move_index = 0
-if 'board' not in st.session_state:
-    st.session_state.board = chess.Board()
-
-# For the interactive chessboard
-if 'interactive_board' not in st.session_state:
-    st.session_state.interactive_board = chess.Board()
-if 'interactive_moves_history' not in st.session_state:
-    st.session_state.interactive_moves_history = []
-if 'interactive_current_move_index' not in st.session_state:
-    st.session_state.interactive_current_move_index = 0
+
+# For the interactive chessboard: parsed moves, a cursor and the board at the cursor (see openings/history.py)
+if 'interactive_history' not in st.session_state:
+    st.session_state.interactive_history = MoveHistory()
+# Opening label per ply of the interactive history (entry i = catalogue row after i plies, or NO_OPENING)
+NO_OPENING = -1
+if 'interactive_opening_labels' not in st.session_state:
+    st.session_state.interactive_opening_labels = array('i', [NO_OPENING])
+# PGN text of the interactive game, extended as moves are played (see openings/export.py)
+if 'interactive_pgn' not in st.session_state:
+    st.session_state.interactive_pgn = IncrementalPgn()
 if 'pgn_file_id' not in st.session_state:
     st.session_state.pgn_file_id = None
 
-# Load the chess openings data
-@st.cache_data
+# Load the chess openings data from the compiled binary catalogue (see openings/catalogue.py).
+# It is memory-mapped and rebuilt automatically when chess_openings.csv changes.
+@st.cache_resource
+def load_catalogue():
+    return open_catalogue(DEFAULT_CSV)
+
+# A resource, not cache_data: the frame is shared read-only by every session instead of copied on each run
+@st.cache_resource
 def load_data():
     try:
-        df = pd.read_csv("chess_openings.csv")
+        df = load_catalogue().frame()
         return df
     except FileNotFoundError:
         st.error("ERROR: `chess_openings.csv` not found. Please ensure the file exists in the same directory as `dashboard.py`.")
         return pd.DataFrame(columns=['ECO', 'Name', 'Moves', 'Description'])
 
-chess_df = load_data()
+def catalogue_checksum():
+    """SHA-256 of the CSV the loaded catalogue was compiled from (None without a catalogue).
+
+    Everything derived from the catalogue is cached on this key and receives the
+    DataFrame as an unhashed `_df`, so no rerun hashes the whole frame.
+    """
+    try:
+        return load_catalogue().meta.get("source_sha256")
+    except FileNotFoundError:
+        return None
+
+def build_catalogue_job(job):
+    """Compiles chess_openings.csv in the background, then drops the cached catalogue and its DataFrame.
+
+    Everything else derived from the catalogue is cached per checksum, so it follows the new one.
+    """
+    build_catalogue(DEFAULT_CSV, on_progress=lambda fraction: job.update(fraction, f"Compiling openings ({fraction:.0%})"))
+    load_catalogue.clear()
+    load_data.clear()
+
+def start_catalogue_build():
+    # Keyed, so sessions arriving during a build wait for the same job
+    st.session_state.catalogue_job = job_manager.submit("Catalogue build", build_catalogue_job, key="catalogue-build")
+
+@st.fragment(run_every=1.0)
+def show_job_progress(state_key, text):
+    """Polls a background job kept in st.session_state[state_key]; reruns the whole page once it has finished."""
+    job = st.session_state.get(state_key)
+    if job is None or job.done:
+        st.rerun()
+    st.progress(job.progress, text=job.message or text)
+    st.button("✖️ Cancel", key=f"{state_key}_cancel", on_click=job.cancel)
+    return job
+
+# The compiled catalogue is checked once per session; a missing or stale one is compiled by a
+# background job while the page shows its progress, instead of blocking the first script run.
+if 'catalogue_checked' not in st.session_state:
+    st.session_state.catalogue_checked = True
+    if not catalogue_is_current(DEFAULT_CSV):
+        start_catalogue_build()
+if 'catalogue_job' in st.session_state:
+    catalogue_job = st.session_state.catalogue_job
+    if not catalogue_job.done:
+        show_job_progress("catalogue_job", "Preparing the openings catalogue...")
+        profiler.finish()
+        st.stop()
+    del st.session_state.catalogue_job
+    job_manager.forget(catalogue_job.id)
+    if catalogue_job.status == FAILED:
+        st.error(f"Could not compile the openings catalogue: {catalogue_job.error}")
+    elif catalogue_job.status == CANCELLED and not catalogue_is_current(DEFAULT_CSV):
+        del st.session_state.catalogue_checked  # checked (and started) again on the next run
+        st.warning("The openings catalogue build was cancelled. Reload the page to start it again.")
+        profiler.finish()
+        st.stop()
+
+with profiler.section("data_load"):
+    chess_df = load_data()
+    catalogue_sha256 = catalogue_checksum()
+
+# Compile every opening line once per catalogue (SAN, UCI, FEN and Zobrist key per ply).
+# The index is immutable and shared by all sessions, so it lives in the resource cache.
+# The per-ply data comes precompiled from the catalogue, so no SAN is parsed here.
+@st.cache_resource
+def build_opening_index(catalogue_sha256, _df):
+    if _df.empty:
+        return OpeningIndex.from_dataframe(_df)
+    return load_catalogue().opening_index()
+
+with profiler.section("data_load"):
+    opening_index = build_opening_index(catalogue_sha256, chess_df)
+
+@st.cache_resource
+def build_opening_classifier(catalogue_sha256, _df):
+    return OpeningClassifier(build_opening_index(catalogue_sha256, _df))
+
+with profiler.section("data_load"):
+    opening_classifier = build_opening_classifier(catalogue_sha256, chess_df)
+
+# Name n-gram, ECO and move-sequence indexes, so filtering never scans the whole DataFrame
+@st.cache_resource
+def build_opening_search(catalogue_sha256, _df):
+    return OpeningSearch(_df, build_opening_index(catalogue_sha256, _df))
+
+with profiler.section("data_load"):
+    opening_search = build_opening_search(catalogue_sha256, chess_df)
+
+# Sort ranks per column for the paged openings table
+@st.cache_resource
+def build_opening_table(catalogue_sha256, _df):
+    return OpeningTable(_df)
+
+with profiler.section("data_load"):
+    opening_table = build_opening_table(catalogue_sha256, chess_df)
+
+# Most openings offered by the picker at once
+PICKER_LIMIT = 100
+
+# Continuations per position for the explorer; uploaded games add their own table per session
+@st.cache_resource
+def build_opening_explorer(catalogue_sha256, _df):
+    return OpeningExplorer(build_opening_index(catalogue_sha256, _df))
+
+with profiler.section("data_load"):
+    opening_explorer = build_opening_explorer(catalogue_sha256, chess_df)
+
+# ECO, family, theme and depth codes per row, so the sidebar never scans the catalogue
+@st.cache_resource
+def build_opening_stats(catalogue_sha256, _df):
+    return OpeningStats(_df, build_opening_index(catalogue_sha256, _df))
+
+with profiler.section("data_load"):
+    opening_stats = build_opening_stats(catalogue_sha256, chess_df)
+
+# Derived artefacts (board SVGs, legal moves, upload reports) shared by every session of the server
+# process, within DASHBOARD_CACHE_MB of memory. DASHBOARD_CACHE_DB names a SQLite file that backs the
+# cache, so several server processes on one machine share their artefacts too (see openings/cache.py).
+@st.cache_resource
+def get_artefact_cache():
+    backend = SqliteBackend(os.environ["DASHBOARD_CACHE_DB"]) if os.environ.get("DASHBOARD_CACHE_DB") else None
+    max_bytes = int(os.environ["DASHBOARD_CACHE_MB"]) * 2**20 if os.environ.get("DASHBOARD_CACHE_MB") else DEFAULT_MAX_BYTES
+    return ArtefactCache(max_bytes, backend)
+
+with profiler.section("data_load"):
+    artefact_cache = get_artefact_cache()
+
+# Set PREWARM_BOARD_SVGS=1 to render every position of the opening table at startup instead of on first view.
+@st.cache_resource
+def get_svg_cache(catalogue_sha256, _df):
+    cache = SvgRenderCache(get_artefact_cache())
+    if os.environ.get("PREWARM_BOARD_SVGS") == "1":
+        cache.prewarm(build_opening_index(catalogue_sha256, _df))
+    return cache
+
+with profiler.section("data_load"):
+    svg_cache = get_svg_cache(catalogue_sha256, chess_df)
+
+# One process pool per server process, reused by every session for large PGN uploads. Its workers load
+# the compiled catalogue themselves, so when the catalogue's checksum changes the pool is shut down and
+# replaced rather than kept next to a new one.
+@st.cache_resource
+def get_pgn_analyser_slot():
+    return {"lock": threading.Lock(), "checksum": None, "analyser": None}
+
+def get_pgn_analyser(source_sha256):
+    slot = get_pgn_analyser_slot()
+    with slot["lock"]:
+        if slot["analyser"] is None or slot["checksum"] != source_sha256:
+            if slot["analyser"] is not None:
+                slot["analyser"].shutdown()
+            slot["analyser"], slot["checksum"] = ParallelPgnAnalyser(DEFAULT_CSV), source_sha256
+        return slot["analyser"]
+
+# Optional engine evaluation (see openings/engine.py): Stockfish from the PATH, or the command in
+# DASHBOARD_ENGINE ("stub" for the built-in stub engine). Evaluations persist in DASHBOARD_EVAL_DB.
+# DASHBOARD_ENGINE_WORKERS and DASHBOARD_ENGINE_DEPTH set the number of engines and the search depth.
+ENGINE_TIMEOUT = 30  # seconds a script run waits for an evaluation; the analysis goes on and is cached
+
+@st.cache_resource
+def get_engine_pool():
+    command = find_engine()
+    if command is None:
+        return None
+    try:
+        return EnginePool(
+            command,
+            workers=int(os.environ.get("DASHBOARD_ENGINE_WORKERS", DEFAULT_WORKERS)),
+            depth=int(os.environ.get("DASHBOARD_ENGINE_DEPTH", DEFAULT_DEPTH)),
+            cache=SqliteBackend(os.environ.get("DASHBOARD_EVAL_DB", DEFAULT_CACHE_PATH)))
+    except (OSError, chess.engine.EngineError) as e:
+        st.warning(f"Engine evaluation is unavailable: could not start `{command}` ({e}).")
+        return None
+
+engine_pool = get_engine_pool()
+
+def evaluate_catalogue_job(job):
+    """Job: evaluates every opening's final position into the persistent evaluation cache."""
+    boards = [line.board_at(len(line)) for line in opening_index.lines]
+    return engine_pool.evaluate_many(
+        boards, on_progress=lambda done, total: job.update(done / total, f"Evaluated {done:,} of {total:,} positions"))
+
+def analyse_uploaded_pgn(uploaded_file):
+    """Classifies every game of an upload, once per distinct file and catalogue across all sessions.
+
+    Returns (report, job): a cached report and no job, or the report being filled
+    by a background job (read it under `job.lock` until the job is done).
+    """
+    # Hashed and spilled in 1 MiB blocks straight from the upload's buffer, so no copy of the file is made in memory
+    digest = hashlib.sha256()
+    uploaded_file.seek(0)
+    for block in iter(lambda: uploaded_file.read(1 << 20), b""):
+        digest.update(block)
+    key = (load_catalogue().meta.get("source_sha256"), digest.hexdigest())
+    report = artefact_cache.get("pgn_report", key)
+    if report is not None:
+        return report, None
+    # The job (and the worker processes, for large files) read the games from a temporary file,
+    # removed once the job has finished or was cancelled before it started.
+    with tempfile.NamedTemporaryFile(suffix=".pgn", delete=False) as spill:
+        uploaded_file.seek(0)
+        shutil.copyfileobj(uploaded_file, spill, 1 << 20)
+    report = IngestReport()
+    job = job_manager.submit(f"Classify {uploaded_file.name}", classify_uploaded_pgn, spill.name, report, key)
+    job.add_done_callback(lambda job: os.unlink(spill.name))
+    return report, job
+
+def classify_uploaded_pgn(job, path, report, key):
+    """Job: classifies every game of the spilled upload at `path` into `report`: in worker processes when it is large, inline otherwise."""
+    on_progress = lambda games, fraction: job.update(fraction, f"Scanned {games:,} games...")
+    if os.path.getsize(path) < PARALLEL_THRESHOLD_BYTES or (os.cpu_count() or 1) < 2:
+        with open(path, "rb") as handle:
+            ingest_pgn(handle, opening_classifier, chess_df, on_progress=on_progress,
+                       explorer_plies=EXPLORER_PLIES, report=report, lock=job.lock)
+    else:
+        catalogue_sha256, _ = key
+        get_pgn_analyser(catalogue_sha256).analyse(path, on_progress=on_progress, explorer_plies=EXPLORER_PLIES,
+                                                   report=report, lock=job.lock)
+    # Reports can be large and are only reused by sessions of this process, so they are not written to the backend
+    return artefact_cache.put("pgn_report", key, report, persist=False)
+
+def cancel_pgn_job():
+    job = st.session_state.pop('pgn_job', None)
+    if job is not None:
+        job.cancel()
+        job_manager.forget(job.id)
+
+def deferred_pgn(write, *args):
+    """Download data for st.download_button: `write(*args, handle)` runs only when the button is clicked."""
+    def build():
+        handle = io.StringIO()
+        write(*args, handle)
+        return handle.getvalue()
+    return build
+
+def current_explorer():
+    """The catalogue explorer, with the move statistics of this session's uploaded games if there are any."""
+    if 'pgn_report' in st.session_state:
+        return opening_explorer.with_games(st.session_state.pgn_report.tree, st.session_state.pgn_report_lock)
+    return opening_explorer
+
+def show_explorer(board, key):
+    """Continuations of `board` from the catalogue (and uploaded games); computed only while switched on."""
+    if not st.toggle("🔭 Explore continuations", key=key, help="Moves played from this position in the catalogue lines and, after a PGN upload, in its games."):
+        return None
+    table = current_explorer().to_frame(board, chess_df)
+    if table.empty:
+        st.caption("No catalogue line or uploaded game continues from this position.")
+    else:
+        st.dataframe(table, hide_index=True)
+    return table
+
+def show_evaluation(board, key):
+    """Engine evaluation of `board`: shown when already cached, computed only while switched on."""
+    if engine_pool is None:
+        return
+    evaluate = st.toggle("🧠 Engine evaluation", key=key, help=f"Evaluates positions to depth {engine_pool.depth} with {engine_pool.name}.")
+    evaluation = engine_pool.cached(board)
+    if evaluation is None and evaluate:
+        with st.spinner(f"Analysing to depth {engine_pool.depth}..."):
+            try:
+                evaluation = engine_pool.evaluate(board, timeout=ENGINE_TIMEOUT)
+            except concurrent.futures.TimeoutError:
+                st.warning("The engine is still busy with this position; its evaluation will appear on a later run.")
+            except concurrent.futures.CancelledError:
+                st.warning("This position's evaluation was cancelled; switch the evaluation off and on to retry.")
+            except chess.engine.EngineError as e:
+                st.error(f"The engine failed to evaluate this position: {e}")
+    if evaluation is not None:
+        best_move = chess.Move.from_uci(evaluation.best_move) if evaluation.best_move else None
+        st.metric(f"Evaluation (depth {evaluation.depth}, White's view)", evaluation.describe(),
+                  help=f"Best move: {board.san(best_move)}" if best_move and board.is_legal(best_move) else None)
+
+def format_move_list(sans, current_ply=None):
+    """Numbered move list ("1. e4 c5 2. Nf3") with the move at `current_ply` in bold."""
+    parts = []
+    for ply, san in enumerate(sans, start=1):
+        text = f"**{san}**" if ply == current_ply else san
+        parts.append(f"{(ply + 1) // 2}. {text}" if ply % 2 else text)
+    return " ".join(parts)
+
+def describe_opening(row):
+    """Human-readable label for a catalogue row returned by the classifier."""
+    if row is None or row == NO_OPENING:
+        return "Unclassified (no catalogue opening reached yet)"
+    opening = chess_df.iloc[row]
+    return f"{opening['ECO']} · {opening['Name']}"
 
 # Gracefully handle if chess_df is empty from the start
 if chess_df.empty:
@@ -227,118 +578,135 @@ if chess_df.empty:
 # Display the dataframe
 st.subheader("Chess Openings Data")
 
-# Initialize filtered_df with the original DataFrame
-# This check is important if chess_df could be empty due to load_data failure
-if not chess_df.empty:
-    filtered_df = chess_df
-else:
-    filtered_df = pd.DataFrame(columns=['ECO', 'Name', 'Moves', 'Description'])
-
-# Filtering options in columns
-filter_col1, filter_col2 = st.columns(2)
-
-with filter_col1:
-    eco_codes = ["All"] + sorted(chess_df["ECO"].unique().tolist())
-    selected_eco = st.selectbox("🏷️ Filter by ECO Code:", eco_codes)
-    if selected_eco != "All": # Apply ECO filter immediately if selected
-        filtered_df = filtered_df[filtered_df["ECO"] == selected_eco]
-
-with filter_col2:
-    name_query = st.text_input("🔍 Search by Name:", "")
-    if name_query: # Apply name filter if query exists
-        filtered_df = filtered_df[filtered_df["Name"].str.contains(name_query, case=False, na=False)]
-
-st.dataframe(filtered_df) # Display the possibly filtered dataframe
+with profiler.section("filters"):
+    # Filtering options in columns. The filters are answered from the search indexes as an array
+    # of catalogue row positions; only the page on screen is ever selected from the DataFrame.
+    filter_col1, filter_col2, filter_col3 = st.columns(3)
+
+    with filter_col1:
+        eco_codes = ["All"] + opening_search.eco_codes
+        selected_eco = st.selectbox("🏷️ Filter by ECO Code:", eco_codes)
+
+    with filter_col2:
+        name_query = st.text_input("🔍 Search by Name:", "")
+
+    with filter_col3:
+        moves_query = st.text_input("♟️ Search by Moves:", "", help="Openings passing through the position after these moves, in any move order (e.g. 1. d4 Nf6 2. c4).")
+
+    filtered_rows, name_is_fuzzy = opening_search.search(
+        eco=selected_eco if selected_eco != "All" else None, name_query=name_query, moves_query=moves_query)
+    if filtered_rows is None:
+        st.warning(f"The moves '{moves_query}' cannot be played from the initial position.")
+        filtered_rows = opening_search.all_rows[:0]
+    if name_is_fuzzy and len(filtered_rows):
+        st.caption(f"No opening name contains '{name_query}'; showing the closest matches.")
+
+with profiler.section("dataframe"):
+    # Sorting and paging happen here; the browser only receives the rows of the current page.
+    sort_col, order_col, size_col, page_col = st.columns([2, 1, 1, 1])
+    with sort_col:
+        sort_by = st.selectbox("Sort by:", ["Relevance"] + list(SORTABLE_COLUMNS), key="table_sort",
+                               help="Relevance is catalogue order, or closeness for fuzzy name matches.")
+    with order_col:
+        descending = st.toggle("Descending", key="table_descending")
+    with size_col:
+        page_size = st.selectbox("Rows per page:", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE), key="table_page_size")
+    pages = page_count(len(filtered_rows), page_size)
+    if st.session_state.get("table_page", 1) > pages:
+        st.session_state.table_page = pages
+    with page_col:
+        page_number = st.number_input(f"Page (of {pages}):", min_value=1, max_value=pages, step=1, key="table_page")
+
+    sorted_rows = opening_table.sort(filtered_rows, None if sort_by == "Relevance" else sort_by, descending)
+    page_rows = paginate(sorted_rows, page_number, page_size)
+    # The index of the page is the catalogue row ID that the opening picker below refers to
+    st.dataframe(chess_df.iloc[page_rows].rename_axis("ID"))
+    if len(filtered_rows):
+        first = (min(page_number, pages) - 1) * page_size
+        st.caption(f"Showing {first + 1:,}–{first + len(page_rows):,} of {len(filtered_rows):,} openings")
+        st.download_button(
+            f"⬇️ Download these {len(filtered_rows)} openings as PGN",
+            data=deferred_pgn(export_openings, chess_df, opening_index, sorted_rows),
+            file_name="chess_openings.pgn",
+            mime="application/x-chess-pgn",
+            on_click="ignore")
 
 st.divider()
 
-if not filtered_df.empty:
-    # Ensure opening_names is not created if filtered_df is empty
-    opening_names = ["---"] + filtered_df["Name"].tolist() if not filtered_df.empty else ["---"]
-    selected_opening_name = st.selectbox("Select Opening to View Details:", opening_names)
-
-    if selected_opening_name != "---" and not filtered_df.empty: # Added check for filtered_df
-        selected_opening_data = filtered_df[filtered_df["Name"] == selected_opening_name]
-        if not selected_opening_data.empty:
+with profiler.section("opening_detail"):
+    if len(filtered_rows):
+        # The picker offers the rows of the current table page, or the filtered openings matching the
+        # picker's own query, at most PICKER_LIMIT at a time. Openings are picked by row ID, as names repeat.
+        selected_row = st.session_state.selected_opening_row
+        if selected_row is not None and not (filtered_rows == selected_row).any():
+            selected_row = st.session_state.selected_opening_row = None
+        picker_query = st.text_input("Find an opening to view:", key="opening_picker_query",
+                                     placeholder="Type part of a name, or pick from the current page below")
+        if picker_query:
+            window = narrow(filtered_rows, opening_search.by_name(picker_query)[0])[:PICKER_LIMIT]
+        else:
+            window = page_rows[:PICKER_LIMIT]
+        picker_options = [None] + [int(row) for row in window]
+        if selected_row is not None and selected_row not in picker_options:
+            picker_options.insert(1, selected_row)
+
+        def pick_opening():
+            st.session_state.selected_opening_row = st.session_state.opening_picker
+
+        st.selectbox("Select Opening to View Details:", picker_options, index=picker_options.index(selected_row),
+                     format_func=lambda row: "---" if row is None else f"{chess_df.iloc[row]['Name']} ({chess_df.iloc[row]['ECO']}, #{row})",
+                     key="opening_picker", on_change=pick_opening)
+
+        if selected_row is not None:
+            opening = chess_df.iloc[selected_row]
             with st.container(border=True): # Group opening details
-                st.subheader(selected_opening_data['Name'].iloc[0])
-                st.markdown(f"**ECO:** {selected_opening_data['ECO'].iloc[0]}")
-                st.markdown(f"**Moves:** `{selected_opening_data['Moves'].iloc[0]}`")
-                st.markdown(f"**Description:** {selected_opening_data['Description'].iloc[0]}")
+                st.subheader(opening['Name'])
+                st.markdown(f"**ECO:** {opening['ECO']}")
+                st.markdown(f"**Moves:** `{opening['Moves']}`")
+                st.markdown(f"**Description:** {opening['Description']}")
 
-                moves_str = selected_opening_data['Moves'].iloc[0]
+                moves_str = opening['Moves']
+                opening_line = opening_index.line(selected_row)
 
                 # Check if the selected opening has changed
-                if selected_opening_name != st.session_state.selected_opening_name_key:
-                    st.session_state.selected_opening_name_key = selected_opening_name
+                if selected_row != st.session_state.selected_opening_row_key:
+                    st.session_state.selected_opening_row_key = selected_row
                     st.session_state.current_move_index = 0
-                    st.session_state.board = chess.Board()
-                    if moves_str:
-                        st.session_state.current_opening_moves = [m for m in moves_str.split(' ') if m] # Filter out empty strings
-                    else:
-                        st.session_state.current_opening_moves = []
                     # No moves played yet, board is fresh for the new opening
 
-                if st.session_state.current_opening_moves:
+                if opening_line.error:
+                    st.warning(f"This opening's move list is only playable up to ply {len(opening_line)}. {opening_line.error}")
+
+                if len(opening_line):
                     st.subheader("Board Position:")
 
-                    # Navigation buttons
+                    # Navigation buttons. Positions are precompiled, so each step is a lookup, not a replay.
                     col1_nav, col2_nav = st.columns(2) # Renamed to avoid conflict with filter columns
                     with col1_nav:
                         if st.button("⬅️ Previous Move", disabled=st.session_state.current_move_index == 0):
                             st.session_state.current_move_index -= 1
-                            st.session_state.board.pop()
 
                     with col2_nav:
-                        if st.button("➡️ Next Move", disabled=st.session_state.current_move_index == len(st.session_state.current_opening_moves)):
-                            try:
-                                move_to_play = st.session_state.current_opening_moves[st.session_state.current_move_index]
-                                st.session_state.board.push_san(move_to_play)
-                                st.session_state.current_move_index += 1
-                            except (chess.InvalidMoveError, chess.IllegalMoveError, chess.AmbiguousMoveError) as e:
-                                st.warning(f"Invalid move '{move_to_play}': {e}")
-                            except IndexError:
-                                 st.warning("No more moves to play.")
-
+                        if st.button("➡️ Next Move", disabled=st.session_state.current_move_index == len(opening_line)):
+                            st.session_state.current_move_index += 1
 
                     # Display board and move count
-                    st.image(chess.svg.board(board=st.session_state.board))
-                    st.write(f"Move: {st.session_state.current_move_index} / {len(st.session_state.current_opening_moves)}")
-
-                elif moves_str and not filtered_df.empty : # Handles openings that might have moves but they are invalid from the start
+                    st.image(svg_cache.render(opening_line.fens[st.session_state.current_move_index],
+                                              lastmove=opening_line.last_move_at(st.session_state.current_move_index)))
+                    st.write(f"Move: {st.session_state.current_move_index} / {len(opening_line)}")
+                    show_explorer(opening_line.board_at(st.session_state.current_move_index), "opening_explorer")
+                    st.caption("Final position of the line:")
+                    show_evaluation(opening_line.board_at(len(opening_line)), "opening_evaluation")
+
+                elif moves_str: # Handles openings that might have moves but they are invalid from the start
                     st.warning("This opening has moves listed, but they could not be processed to display a board.")
-                # If filtered_df is empty, this whole detail section is skipped by selected_opening_name != "---" and not filtered_df.empty
             st.markdown("<br>", unsafe_allow_html=True) # Add some space after the container
 
 st.divider()
 st.header("Interactive Chessboard")
 
-with st.container(border=True): # Group interactive chessboard section
-    # Helper function to replay interactive board to a specific move index
-    def replay_interactive_board_to_index(move_idx):
-        """
-        Replays moves from st.session_state.interactive_moves_history up to move_idx
-        and updates st.session_state.interactive_board.
-        """
-    board = chess.Board()
-    # Only try to replay moves if there's history and index is valid
-    if st.session_state.interactive_moves_history and move_idx > 0 :
-        for i in range(move_idx):
-            # Check if the move index is within the bounds of the history list
-            if i < len(st.session_state.interactive_moves_history):
-                try:
-                    board.push_san(st.session_state.interactive_moves_history[i])
-                except (chess.InvalidMoveError, chess.IllegalMoveError, chess.AmbiguousMoveError) as e:
-                    st.error(f"Error replaying move '{st.session_state.interactive_moves_history[i]}' at index {i} (specific chess error): {e}")
-                    break
-                except Exception as e: # Fallback for other unexpected errors
-                    st.error(f"An unexpected error occurred while replaying move '{st.session_state.interactive_moves_history[i]}' at index {i}: {e}")
-                    break
-            else: # Should not happen if move_idx is managed correctly
-                st.warning(f"Attempted to replay move at index {i} beyond history length.")
-                break
-    st.session_state.interactive_board = board
-
+with st.container(border=True), profiler.section("interactive_board"): # Group interactive chessboard section
+    history = st.session_state.interactive_history
 
     # UI for PGN Upload
     uploaded_pgn_file = st.file_uploader("⬆️ Upload PGN File", type=["pgn"], accept_multiple_files=False, key="pgn_uploader")
@@ -348,159 +716,268 @@ with st.container(border=True): # Group interactive chessboard section
         file_id = f"{uploaded_pgn_file.name}-{uploaded_pgn_file.size}"
         if st.session_state.pgn_file_id != file_id:
             st.session_state.pgn_file_id = file_id
+            cancel_pgn_job()
             if 'pgn_processed' in st.session_state:
                 del st.session_state.pgn_processed
+            if 'pgn_report' in st.session_state:
+                del st.session_state.pgn_report
+    elif 'pgn_job' in st.session_state:
+        cancel_pgn_job()  # the file was removed from the uploader
 
     if uploaded_pgn_file is not None and 'pgn_processed' not in st.session_state:
         try:
-            pgn_bytes = uploaded_pgn_file.getvalue()
-            pgn_string = pgn_bytes.decode("utf-8")
-            pgn_file_like = io.StringIO(pgn_string)
-            game = chess.pgn.read_game(pgn_file_like)
+            # The upload is streamed straight from its buffer; only the first game is fully parsed.
+            game = read_first_game(uploaded_pgn_file)
 
             if game:
-                # Clear existing interactive game state
-                st.session_state.interactive_moves_history = []
-                st.session_state.interactive_board = chess.Board() # Reset board
-                st.session_state.interactive_current_move_index = 0
-
-                temp_board_for_san = chess.Board()
-                for move in game.mainline_moves():
-                    san_move = temp_board_for_san.san(move)
-                    st.session_state.interactive_moves_history.append(san_move)
-                    temp_board_for_san.push(move)
+                # Replace the interactive game with the PGN mainline, cursor at the start position
+                history = st.session_state.interactive_history = MoveHistory()
+                history.extend(game.mainline_moves())
+                st.session_state.interactive_opening_labels = array('i', (
+                    NO_OPENING if row is None else row for row in opening_classifier.label_moves(history.moves)))
+                history.rewind()
 
                 st.session_state.pgn_processed = True
-                replay_interactive_board_to_index(st.session_state.interactive_current_move_index)
                 st.success("PGN file uploaded and processed successfully. Board and history reset to PGN content.")
-                # Board UI will be fresh as index is 0 and board is new.
-                # replay_interactive_board_to_index(0) # Call this to be explicit if needed, but should be covered.
-                # Clear the uploader after processing by rerunning with uploaded_pgn_file = None
-                # This usually requires a more complex callback structure or session state trick
-                # For now, the file will remain in the uploader widget until the user removes it or uploads another.
-                # To allow re-uploading the same file, we can set key to a new value or use st.experimental_rerun
-                # For simplicity, we'll leave it as is. The user can remove and re-upload.
+                st.info(f"Game opening: {describe_opening(st.session_state.interactive_opening_labels[-1])}")
+
+                # Every game in the file (not just the first) is classified into an aggregate report by a
+                # background job. The report grows as games are read, so the first games can be explored
+                # (and the page used) while the rest of the file is still being parsed.
+                pgn_report, pgn_job = analyse_uploaded_pgn(uploaded_pgn_file)
+                st.session_state.pgn_report = pgn_report
+                st.session_state.pgn_report_lock = pgn_job.lock if pgn_job is not None else threading.Lock()
+                if pgn_job is not None:
+                    st.session_state.pgn_job = pgn_job
+                # The file remains in the uploader widget until the user removes it or uploads another;
+                # the pgn_processed flag keeps it from being reprocessed on every rerun.
 
             else:
                 st.error("Error: Could not parse PGN file. Please ensure it's a valid PGN.")
         except Exception as e:
             st.error(f"An error occurred while processing the PGN file: {e}")
-        # To prevent reprocessing on every script rerun after a successful upload,
-        # you might want to clear uploaded_pgn_file from session_state or use a flag.
-        # For now, this will reprocess if the user interacts with another widget.
-        # A common pattern is to use st.session_state to store the "processed" state of the file.
-
-    # UI for move input
-    move_input = st.text_input("Enter your move (e.g., e4, Nf3):", key="interactive_move_input_key", help="Use Standard Algebraic Notation (e.g., e4, Nf3, O-O for castling).")
-    # st.caption("Use Standard Algebraic Notation (e.g., e4, Nf3, O-O for castling).") # Alternative way to add help text
-    make_move_button = st.button("▶️ Make Move", key="interactive_make_move_button_key")
 
-    if make_move_button and move_input:
+    # Progress of the upload's analysis job; the finished (or cancelled) job's report stays in the session
+    if 'pgn_job' in st.session_state:
+        pgn_job = st.session_state.pgn_job
+        if not pgn_job.done:
+            show_job_progress("pgn_job", "Waiting to scan the games in the PGN file...")
+        else:
+            del st.session_state.pgn_job
+            job_manager.forget(pgn_job.id)
+            if pgn_job.status == CANCELLED:
+                st.warning(f"Analysis cancelled: the report covers the first {st.session_state.pgn_report.games} games only.")
+            elif pgn_job.status == FAILED:
+                st.error(f"An error occurred while analysing the PGN file: {pgn_job.error}")
+
+    # Batch ECO report for all games of the uploaded file (computed once per upload, partial while its job runs)
+    if uploaded_pgn_file is not None and 'pgn_report' in st.session_state:
+        pgn_report = st.session_state.pgn_report
+        with st.session_state.pgn_report_lock:
+            games, plies, errors, report_frame = pgn_report.games, pgn_report.plies, pgn_report.errors, pgn_report.to_frame()
+        with st.expander(f"📚 Openings in uploaded file ({games} games)", expanded=games > 1):
+            report_col1, report_col2, report_col3 = st.columns(3)
+            report_col1.metric("Games", games)
+            report_col2.metric("Average length (plies)", round(plies / games, 1) if games else 0)
+            report_col3.metric("Parse errors", errors)
+            st.dataframe(report_frame, hide_index=True)
+            # The callable runs on another thread, so it reads its own copy of the upload, and only on click
+            upload = uploaded_pgn_file
+            st.download_button(
+                "⬇️ Download all games with ECO tags",
+                data=deferred_pgn(lambda handle: export_classified_games(
+                    io.BytesIO(upload.getvalue()), opening_classifier, chess_df, handle)),
+                file_name=f"{os.path.splitext(uploaded_pgn_file.name)[0]}_classified.pgn",
+                mime="application/x-chess-pgn",
+                on_click="ignore")
+
+    # Moves are played in on_click callbacks: they run before the widgets are created,
+    # which is the only point where the text input may be cleared.
+    def play_interactive_move(play):
+        """Plays `play(history)` on the interactive history and labels the new position."""
+        history = st.session_state.interactive_history
+        # If the cursor is not at the end (the user went back), the new move truncates the old future
+        # and starts a new branch of history.
+        labels = st.session_state.interactive_opening_labels[:history.cursor + 1]
+        play(history)
+        labels.append(opening_classifier.next_label(history.board, labels[-1]))
+        st.session_state.interactive_opening_labels = labels
+
+    def make_interactive_move():
+        move_input = st.session_state.interactive_move_input_key.strip()
+        if not move_input:
+            return
         try:
-            # When a new move is made, it's on the current state of st.session_state.interactive_board
-            # If interactive_current_move_index is not at the end of history (e.g., user went back, then made a new move),
-            # this new move should effectively create a new branch of history.
-            # For simplicity, let's assume new moves always append to the current board state,
-            # and if the user was in the past, this new move truncates any "future" moves from old history.
-            if st.session_state.interactive_current_move_index < len(st.session_state.interactive_moves_history):
-                # User had navigated back, now making a new move. Truncate old future.
-                st.session_state.interactive_moves_history = st.session_state.interactive_moves_history[:st.session_state.interactive_current_move_index]
-                # The board should already be at interactive_current_move_index due to navigation.
-
-            # board_to_update is st.session_state.interactive_board, which is either fresh or replayed to current_move_index
-            st.session_state.interactive_board.push_san(move_input) # Apply new move
-
-            st.session_state.interactive_moves_history.append(move_input)
-            st.session_state.interactive_current_move_index = len(st.session_state.interactive_moves_history)
-
+            play_interactive_move(lambda history: history.push_san(move_input))
             st.session_state.interactive_move_input_key = ""
-            st.success(f"Move '{move_input}' made successfully.")
-            # The board is already up-to-date. No replay needed here.
-
+            st.session_state.interactive_move_feedback = ("success", f"Move '{move_input}' made successfully.")
         except (chess.InvalidMoveError, chess.IllegalMoveError, chess.AmbiguousMoveError) as e:
-            st.error(f"Invalid move '{move_input}': {e}")
-        except Exception as e:
-            st.error(f"An unexpected error occurred while making move '{move_input}': {e}")
+            st.session_state.interactive_move_feedback = ("error", f"Invalid move '{move_input}': {e}")
+
+    def play_explorer_move():
+        san = st.session_state.interactive_explorer_move
+        play_interactive_move(lambda history: history.push_san(san))
+        st.session_state.interactive_move_feedback = ("success", f"Move '{san}' made successfully.")
+
+    # UI for move input
+    st.text_input("Enter your move (e.g., e4, Nf3):", key="interactive_move_input_key", help="Use Standard Algebraic Notation (e.g., e4, Nf3, O-O for castling).")
+    st.button("▶️ Make Move", key="interactive_make_move_button_key", on_click=make_interactive_move)
+
+    if 'interactive_move_feedback' in st.session_state:
+        feedback_kind, feedback_message = st.session_state.pop('interactive_move_feedback')
+        getattr(st, feedback_kind)(feedback_message)
 
-    # Navigation buttons for the interactive board
+    # Navigation buttons for the interactive board. Next pushes one move; Previous rebuilds the board from the
+    # nearest snapshot and replays at most SNAPSHOT_EVERY moves, as the history keeps no move stack.
     col_prev_interactive, col_next_interactive = st.columns(2) # Renamed for clarity
 
     with col_prev_interactive:
-        if st.button("⏪ Previous Interactive Move", key="interactive_prev_move",
-                     disabled=st.session_state.interactive_current_move_index == 0):
-            st.session_state.interactive_current_move_index -= 1
-            replay_interactive_board_to_index(st.session_state.interactive_current_move_index)
+        if st.button("⏪ Previous Interactive Move", key="interactive_prev_move", disabled=history.cursor == 0):
+            history.back()
 
     with col_next_interactive:
-        if st.button("⏩ Next Interactive Move", key="interactive_next_move",
-                     disabled=st.session_state.interactive_current_move_index >= len(st.session_state.interactive_moves_history)):
-            st.session_state.interactive_current_move_index += 1
-            replay_interactive_board_to_index(st.session_state.interactive_current_move_index)
+        if st.button("⏩ Next Interactive Move", key="interactive_next_move", disabled=history.at_end):
+            history.forward()
+
+    # Random access: jumps restart from the nearest position snapshot instead of the initial position
+    if len(history) > 0:
+        st.session_state.interactive_jump_ply = history.cursor
+        st.slider("Jump to move:", min_value=0, max_value=len(history), key="interactive_jump_ply",
+                  on_change=lambda: st.session_state.interactive_history.jump(st.session_state.interactive_jump_ply))
 
     # Display the interactive chessboard and move count
     st.subheader("Current Interactive Board")
-    # Ensure st.session_state.interactive_board is always up-to-date based on user actions
-    if 'interactive_board' in st.session_state:
-        st.image(chess.svg.board(board=st.session_state.interactive_board), caption="Interactive Board")
-    else: # Should ideally not happen if initialized correctly
-        st.warning("Interactive board is not available in session state.")
-
-    if 'interactive_current_move_index' in st.session_state and 'interactive_moves_history' in st.session_state:
-        st.write(f"Move: {st.session_state.interactive_current_move_index} / {len(st.session_state.interactive_moves_history)}")
-    else: # Should ideally not happen
-        st.warning("Interactive move history/index is not available in session state.")
+    st.image(svg_cache.render(history.board, lastmove=history.last_move), caption="Interactive Board")
+    st.write(f"Move: {history.cursor} / {len(history)}")
+    st.markdown(f"**Opening:** {describe_opening(st.session_state.interactive_opening_labels[history.cursor])}")
+    if history.sans:
+        st.caption(format_move_list(history.sans, history.cursor))
+    show_evaluation(history.board, "interactive_evaluation")
+    explorer_table = show_explorer(history.board, "interactive_explorer")
+    if explorer_table is not None and not explorer_table.empty:
+        explore_col, play_col = st.columns([3, 1])
+        explore_col.selectbox("Continuation:", explorer_table["Move"].tolist(), key="interactive_explorer_move", label_visibility="collapsed")
+        play_col.button("▶️ Play", key="interactive_explorer_play", on_click=play_explorer_move)
+    legal_sans = legal_moves_san(artefact_cache, history.board)
+    with st.expander(f"Legal moves ({len(legal_sans)})"):
+        st.caption(" ".join(legal_sans) if legal_sans else "None: the game is over.")
 
     # PGN Download Button
-    if st.session_state.interactive_moves_history:
-        pgn_game = chess.pgn.Game()
-        pgn_game.headers["Event"] = "Interactive Session"
-        pgn_game.headers["Site"] = "Chess Openings Dashboard"
-        pgn_game.headers["Date"] = datetime.date.today().strftime("%Y.%m.%d")
-        pgn_game.headers["Round"] = "-"
-        pgn_game.headers["White"] = "Player1"
-        pgn_game.headers["Black"] = "Player2"
-        pgn_game.headers["Result"] = "*" # Game is ongoing or result unknown
-
-        # Create a temporary board to validate and add moves
-        node = pgn_game
-        for move_san in st.session_state.interactive_moves_history:
-            try:
-                move = node.board().parse_san(move_san)
-                node = node.add_main_variation(move)
-            except (chess.InvalidMoveError, chess.IllegalMoveError, chess.AmbiguousMoveError) as e:
-                st.error(f"Error adding move {move_san} to PGN: {e}")
-                # Optionally skip this move or stop PGN generation
-                break
+    with profiler.section("pgn_download"):
+        if len(history):
+            # The PGN is only generated when the button is clicked, incrementally from the last export
+            interactive_pgn = st.session_state.interactive_pgn
+            st.download_button(
+                label="⬇️ Download PGN",
+                data=lambda: interactive_pgn.render(history, interactive_headers()),
+                file_name="interactive_game.pgn",
+                mime="application/x-chess-pgn",
+                on_click="ignore"
+            )
+    st.markdown("<br>", unsafe_allow_html=True) # Add some space after the container
 
-        pgn_string = str(pgn_game)
 
-        st.download_button(
-            label="⬇️ Download PGN",
-            data=pgn_string,
-            file_name="interactive_game.pgn",
-            mime="application/x-chess-pgn"
-        )
-    st.markdown("<br>", unsafe_allow_html=True) # Add some space after the container
+with profiler.section("sidebar_stats"):
+    st.sidebar.title("📊 Summary Statistics") # Changed from st.sidebar.header
+    st.sidebar.metric("Total Openings Displayed", len(filtered_rows)) # This will be 0 if data loading failed
 
+    if len(filtered_rows):
+        # Counts come from tables precomputed per catalogue and memoised per filter state (openings/stats.py)
+        view_stats = opening_stats.summary(filtered_rows, key=(selected_eco, name_query, moves_query))
 
-st.sidebar.title("📊 Summary Statistics") # Changed from st.sidebar.header
-st.sidebar.metric("Total Openings Displayed", len(filtered_df)) # This will be 0 if data loading failed
+        st.sidebar.subheader("Openings per ECO Code")
+        st.sidebar.bar_chart(view_stats.eco_counts)
 
-if not filtered_df.empty:
-    st.sidebar.subheader("Openings per ECO Code")
-    eco_counts = filtered_df["ECO"].value_counts()
-    st.sidebar.bar_chart(eco_counts)
+        st.sidebar.subheader("Openings per ECO Family")
+        st.sidebar.bar_chart(view_stats.family_counts)
 
-    st.sidebar.divider() # Add a small divider
+        st.sidebar.subheader("Opening Depth (plies)")
+        st.sidebar.bar_chart(view_stats.depth_histogram)
 
-    st.sidebar.subheader("Name Insights")
-    # Calculate number of gambit openings based on the original DataFrame
-    # Ensure 'Name' column exists and is not empty before attempting string operations
-    if 'Name' in chess_df.columns and not chess_df.empty:
-        gambit_count = chess_df[chess_df['Name'].str.contains("Gambit", case=False, na=False)].shape[0]
-    else:
-        gambit_count = 0 # Default to 0 if 'Name' column is missing or df is empty
-    st.sidebar.metric(label="Gambit Openings Found", value=gambit_count)
+        st.sidebar.divider() # Add a small divider
+
+        st.sidebar.subheader("Name Insights")
+        # Gambit count over the whole catalogue, as before; the themes chart follows the filters
+        st.sidebar.metric(label="Gambit Openings Found", value=int(opening_stats.overall.theme_counts["Gambit"]))
+        st.sidebar.bar_chart(view_stats.theme_counts)
 
-else:
-    st.sidebar.info("No data to display statistics for (or data file not found).")
+    else:
+        st.sidebar.info("No data to display statistics for (or data file not found).")
+
+    if 'pgn_report' in st.session_state and st.session_state.pgn_report.games:
+        with st.session_state.pgn_report_lock:
+            uploaded_eco_counts = st.session_state.pgn_report.eco_counts()
+        st.sidebar.divider()
+        st.sidebar.subheader("Uploaded Games per ECO Code")
+        st.sidebar.bar_chart(uploaded_eco_counts)
+
+# Fold this run into the process-wide metrics. DASHBOARD_METRICS_FILE names a Prometheus textfile
+# (e.g. for node_exporter's textfile collector) rewritten after every run.
+metrics = get_metrics_registry()
+metrics.add_gauges("svg_cache", svg_cache.stats)
+metrics.add_gauges("artefact_cache", artefact_cache.stats)
+metrics.add_gauges("sidebar_stats_cache", opening_stats.stats)
+metrics.add_gauges("jobs", job_manager.stats)
+if engine_pool is not None:
+    metrics.add_gauges("engine", engine_pool.stats)
+st.session_state.pop('debug_capturing_profiler', None)
+# Measuring walks every object in this session's state, so it is done on every run only for the debug
+# panel; for the metrics file, at most once per METRICS_FILE_INTERVAL per session.
+metrics_file = os.environ.get("DASHBOARD_METRICS_FILE")
+if debug_panel or (metrics_file and time.monotonic() - st.session_state.get('metrics_measured_at', 0.0) >= METRICS_FILE_INTERVAL):
+    st.session_state.metrics_measured_at = time.monotonic()
+    profiler.measure_session(st.session_state)
+script_run_ctx = get_script_run_ctx()
+metrics.record(profiler, session_id=script_run_ctx.session_id if script_run_ctx else None)
+if metrics_file:
+    metrics.write_prometheus(metrics_file, min_interval=METRICS_FILE_INTERVAL)
+
+if debug_panel:
+    with st.sidebar.expander("🛠️ Debug: performance", expanded=False):
+        st.caption(f"This run: {profiler.total * 1000:.1f} ms over {metrics.runs} recorded runs")
+        st.dataframe(pd.DataFrame(
+            [(name, seconds * 1000, metrics.totals[name][1] / metrics.totals[name][0] * 1000)
+             for name, seconds in profiler.sections.items()],
+            columns=["Section", "This run (ms)", "Mean (ms)"]), hide_index=True)
+        svg_stats, artefact_stats = svg_cache.stats(), artefact_cache.stats()
+        st.metric("Board SVG cache hit rate", f"{svg_stats['hit_rate']:.0%}",
+                  help=f"{svg_stats['entries']} renders, {svg_stats['hits']} hits, {svg_stats['misses']} misses")
+        st.metric("Shared artefact cache", f"{artefact_stats['bytes'] / 2**20:.1f} / {artefact_stats['max_bytes'] / 2**20:.0f} MiB",
+                  help=f"{artefact_stats['entries']} entries, hit rate {artefact_stats['hit_rate']:.0%}"
+                       f" ({artefact_stats['backend_hits']} from the SQLite backend)")
+        job_stats = job_manager.stats()
+        st.metric("Background jobs running", job_stats["active"],
+                  help=f"{job_stats['jobs']} kept, {job_stats['failed']} failed, {job_stats['cancelled']} cancelled")
+        st.button("Rebuild openings catalogue", on_click=start_catalogue_build,
+                  help="Recompiles chess_openings.csv in the background; the page waits for it.")
+        if engine_pool is not None:
+            engine_stats = engine_pool.stats()
+            st.metric("Engine evaluations", engine_stats["analysed"],
+                      help=f"{engine_stats['engines']} engines ({engine_pool.name}), {engine_stats['cache_hits']} answered from the cache")
+            if 'evaluation_job' in st.session_state:
+                evaluation_job = st.session_state.evaluation_job
+                if not evaluation_job.done:
+                    show_job_progress("evaluation_job", "Waiting to evaluate the catalogue...")
+                else:
+                    del st.session_state.evaluation_job
+                    job_manager.forget(evaluation_job.id)
+                    if evaluation_job.status == FAILED:
+                        st.error(f"Catalogue evaluation failed: {evaluation_job.error}")
+            else:
+                # Keyed, so the catalogue is evaluated at most once at a time whichever session asks
+                st.button("Evaluate every opening", help="Fills the evaluation cache with every opening's final position.",
+                          on_click=lambda: st.session_state.update(evaluation_job=job_manager.submit(
+                              "Catalogue evaluation", evaluate_catalogue_job, key="catalogue-evaluation")))
+        session_memory = metrics.session_memory()
+        largest_state = sorted(profiler.session_bytes.items(), key=lambda item: -item[1])[:5]
+        st.metric("This session's state", f"{sum(profiler.session_bytes.values()) / 1024:.1f} KiB",
+                  help="Largest entries: " + ", ".join(f"{key} {size / 1024:.1f} KiB" for key, size in largest_state)
+                       + f". Mean over {session_memory['sessions']} sessions: {session_memory['mean_bytes'] / 1024:.1f} KiB.")
+        if profiler.memory_peak is not None:
+            st.metric("Peak traced memory (this run)", f"{profiler.memory_peak / 2**20:.1f} MiB")
+        if profiler.profile_text:
+            st.code(profiler.profile_text, language=None)
+        st.checkbox("Profile runs with cProfile", key="debug_profile_runs", help="Applies from the next run.")
+        st.checkbox("Trace memory allocations", key="debug_trace_memory", help="Applies from the next run; slows the script down noticeably.")
+        st.download_button("Metrics (JSON)", metrics.to_json(), file_name="dashboard_metrics.json", mime="application/json")
+        st.download_button("Metrics (Prometheus)", metrics.to_prometheus(), file_name="dashboard_metrics.prom", mime="text/plain")
@@ -0,0 +1,49 @@
+"""
+Headless core of the Chess Openings Dashboard.
+
+Catalogue loading, move parsing, opening classification, PGN ingestion and PGN
+export, usable from batch jobs without a Streamlit runtime (see
+`python -m openings --help`). Submodules are imported on first attribute
+access, so `import openings` itself is cheap.
+"""
+import importlib
+
+_EXPORTS = {
+    "Catalogue": "catalogue",
+    "open_catalogue": "catalogue",
+    "build_catalogue": "catalogue",
+    "validate_catalogue": "validate",
+    "OpeningIndex": "index",
+    "OpeningLine": "index",
+    "tokenize_moves": "index",
+    "position_key": "index",
+    "OpeningClassifier": "classifier",
+    "OpeningSearch": "search",
+    "OpeningExplorer": "explorer",
+    "OpeningStats": "stats",
+    "OpeningTable": "table",
+    "IngestReport": "ingest",
+    "ingest_pgn": "ingest",
+    "read_first_game": "ingest",
+    "ParallelPgnAnalyser": "parallel",
+    "MoveHistory": "history",
+    "JobManager": "jobs",
+    "EnginePool": "engine",
+    "SvgRenderCache": "render",
+    "ArtefactCache": "cache",
+    "SqliteBackend": "cache",
+    "game_from_moves": "export",
+    "export_openings": "export",
+    "export_classified_games": "export",
+    "IncrementalPgn": "export",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'openings' has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
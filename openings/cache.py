@@ -0,0 +1,198 @@
+"""
+Process-wide cache of derived position artefacts, optionally backed by SQLite.
+
+Everything the dashboard derives from a position or an upload and that does not
+depend on the session (board SVGs, legal move lists, classified upload
+reports) goes through one `ArtefactCache`, held in `st.cache_resource` so all
+sessions of the server process share it. Entries live in named namespaces, are
+evicted least recently used first once their estimated size exceeds a byte
+budget, and are guarded by a lock, as every session runs the script on its own
+thread.
+
+With a `SqliteBackend` the cache gains a second tier in a local database file:
+misses in memory are looked up there and new artefacts are written through
+(unless put with `persist=False`), so several server processes on one machine
+(or a restarted one) share the work. Values are pickled into the file and
+unpickled when read, so the file must only be writable by trusted processes:
+loading a pickle can run arbitrary code.
+"""
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+
+from .instrumentation import deep_size
+
+DEFAULT_MAX_BYTES = 128 * 2**20
+DEFAULT_BACKEND_ROWS = 200_000
+TRIM_EVERY = 1000  # backend writes between trims to `max_rows`
+
+
+def estimate_size(value):
+    """Resident size of `value` in bytes, with everything it references (see `deep_size`)."""
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    return deep_size(value)
+
+
+class SqliteBackend:
+    """Artefacts pickled into a SQLite file shared by processes; oldest rows are trimmed beyond `max_rows`.
+
+    Reading unpickles what other processes wrote: only point it at a file that
+    untrusted users cannot write to.
+    """
+
+    def __init__(self, path, max_rows=DEFAULT_BACKEND_ROWS):
+        self.path = path
+        self.max_rows = max_rows
+        self._writes = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS artefacts ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+            " PRIMARY KEY (namespace, key))")
+
+    def get(self, namespace, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM artefacts WHERE namespace = ? AND key = ?", (namespace, repr(key))).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, namespace, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO artefacts (namespace, key, value) VALUES (?, ?, ?)",
+                (namespace, repr(key), blob))
+            self._writes += 1
+            if self._writes % TRIM_EVERY == 0:
+                # Rowids grow with insertion, so this drops the oldest rows of every process.
+                self._db.execute(
+                    "DELETE FROM artefacts WHERE rowid <= (SELECT MAX(rowid) FROM artefacts) - ?", (self.max_rows,))
+
+    def clear(self, namespace=None):
+        with self._lock:
+            if namespace is None:
+                self._db.execute("DELETE FROM artefacts")
+            else:
+                self._db.execute("DELETE FROM artefacts WHERE namespace = ?", (namespace,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class ArtefactCache:
+    """Thread-safe, byte-bounded LRU of derived artefacts in namespaces, with an optional backend tier."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, backend=None):
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self.bytes = 0
+        self._entries = OrderedDict()  # (namespace, key) -> (value, size)
+        self._counters = {}  # namespace -> [entries, bytes, hits, backend hits, misses]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _counter(self, namespace):
+        return self._counters.setdefault(namespace, [0, 0, 0, 0, 0])
+
+    def get(self, namespace, key, default=None):
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is not None:
+                self._entries.move_to_end((namespace, key))
+                self._counter(namespace)[2] += 1
+                return entry[0]
+        if self.backend is not None:
+            value = self.backend.get(namespace, key)
+            if value is not None:
+                self._store(namespace, key, value)
+                with self._lock:
+                    self._counter(namespace)[3] += 1
+                return value
+        with self._lock:
+            self._counter(namespace)[4] += 1
+        return default
+
+    def put(self, namespace, key, value, size=None, persist=True):
+        """Stores `value`; with `persist=False` it is kept in memory only, never written to the backend."""
+        self._store(namespace, key, value, size)
+        if persist and self.backend is not None:
+            self.backend.set(namespace, key, value)
+        return value
+
+    def get_or_compute(self, namespace, key, compute, size=None):
+        """The cached artefact, or `compute()` stored under the key. Computation runs outside the lock."""
+        value = self.get(namespace, key)
+        if value is None:
+            value = self.put(namespace, key, compute(), size)
+        return value
+
+    def _store(self, namespace, key, value, size=None):
+        size = estimate_size(value) if size is None else size
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop((namespace, key), None)
+            if previous is not None:
+                self._forget(namespace, previous[1])
+            self._entries[(namespace, key)] = (value, size)
+            counter = self._counter(namespace)
+            counter[0] += 1
+            counter[1] += size
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                (evicted_namespace, _), (_, evicted_size) = self._entries.popitem(last=False)
+                self._forget(evicted_namespace, evicted_size)
+
+    def _forget(self, namespace, size):
+        counter = self._counter(namespace)
+        counter[0] -= 1
+        counter[1] -= size
+        self.bytes -= size
+
+    @property
+    def full(self):
+        return self.bytes >= self.max_bytes * 0.9
+
+    def stats(self, namespace=None):
+        """Entry, size and hit counters of one namespace, or of the whole cache."""
+        with self._lock:
+            counters = [self._counters.get(namespace, [0] * 5)] if namespace else list(self._counters.values())
+            entries, size, hits, backend_hits, misses = (sum(column) for column in zip(*counters)) if counters else [0] * 5
+        lookups = hits + backend_hits + misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "backend_hits": backend_hits,
+            "misses": misses,
+            "hit_rate": (hits + backend_hits) / lookups if lookups else 0.0,
+        }
+
+    def clear(self, namespace=None):
+        """Drops every artefact (of one namespace), in memory and in the backend."""
+        with self._lock:
+            for entry_key in [entry_key for entry_key in self._entries if namespace in (None, entry_key[0])]:
+                _, size = self._entries.pop(entry_key)
+                self._forget(entry_key[0], size)
+            for name in [name for name in self._counters if namespace in (None, name)]:
+                del self._counters[name]
+        if self.backend is not None:
+            self.backend.clear(namespace)
+
+
+def legal_moves_san(cache, board):
+    """SAN of every legal move in `board`'s position, sorted, shared by all sessions."""
+    return cache.get_or_compute("legal_moves", board.epd(), lambda: sorted(board.san(move) for move in board.legal_moves))
@@ -0,0 +1,228 @@
+"""
+Compact binary form of the openings catalogue.
+
+`chess_openings.csv` is compiled once into a directory of NumPy arrays next to
+it (`chess_openings.catalogue/`): the text columns as UTF-8 blobs with offset
+arrays, and every line's plies as packed 16-bit moves, 64-bit Zobrist keys and
+SAN/FEN blobs. The arrays are memory-mapped on load, so a cold start neither
+parses CSV nor replays SAN. The SHA-256 of the source CSV is stored in
+`meta.json`; when the CSV changes the catalogue is rebuilt on the next load.
+
+Build or refresh it ahead of deployment with:
+
+    python -m openings build-catalogue chess_openings.csv
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import chess
+import numpy as np
+import pandas as pd
+
+from .codec import code_to_uci, pack_move
+from .index import OpeningIndex, OpeningLine, compile_line, position_key
+
+FORMAT_VERSION = 1
+DEFAULT_CSV = "chess_openings.csv"
+TEXT_COLUMNS = ["ECO", "Name", "Moves", "Description"]
+START_FEN = chess.Board().fen()
+PROGRESS_ROWS = 1000
+
+
+def catalogue_path_for(csv_path):
+    return os.path.splitext(csv_path)[0] + ".catalogue"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def pack_strings(values):
+    """UTF-8 blob and int64 offsets (one longer than `values`) for a list of strings."""
+    encoded = [value.encode("utf-8") if isinstance(value, str) else b"" for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def unpack_strings(blob, offsets, start=0, stop=None):
+    """Decodes entries `start:stop` of a packed string array."""
+    stop = len(offsets) - 1 if stop is None else stop
+    raw = blob[offsets[start]:offsets[stop]].tobytes()
+    text = raw.decode("utf-8")
+    bounds = (offsets[start:stop + 1] - offsets[start]).tolist()
+    if len(text) == len(raw):
+        # Pure ASCII (always true for SAN and FEN): byte offsets are character offsets.
+        return [text[a:b] for a, b in zip(bounds, bounds[1:])]
+    return [raw[a:b].decode("utf-8") for a, b in zip(bounds, bounds[1:])]
+
+
+def compile_catalogue(df, source_sha256=None, on_progress=None):
+    """Compiles a catalogue DataFrame into the arrays and metadata of the binary format.
+
+    `on_progress(fraction)` is called every `PROGRESS_ROWS` rows; an exception
+    it raises aborts the build.
+    """
+    arrays = {}
+    for column in TEXT_COLUMNS:
+        values = df[column].tolist() if column in df.columns else [""] * len(df)
+        arrays[f"text_{column}"], arrays[f"text_{column}_offsets"] = pack_strings(values)
+
+    moves, keys, sans, fens, errors = [], [], [], [], []
+    line_offsets = np.zeros(len(df) + 1, dtype=np.int64)
+    moves_column = df["Moves"].tolist() if "Moves" in df.columns else [""] * len(df)
+    for row, moves_str in enumerate(moves_column):
+        line = compile_line(row, moves_str)
+        moves.extend(pack_move(chess.Move.from_uci(uci)) for uci in line.ucis)
+        keys.extend(line.keys[1:])
+        sans.extend(line.sans)
+        fens.extend(line.fens[1:])
+        errors.append(line.error or "")
+        line_offsets[row + 1] = line_offsets[row] + len(line)
+        if on_progress and row % PROGRESS_ROWS == 0:
+            on_progress(row / len(df))
+
+    arrays["line_offsets"] = line_offsets
+    arrays["moves"] = np.asarray(moves, dtype=np.uint16)
+    arrays["keys"] = np.asarray(keys, dtype=np.uint64)
+    arrays["san"], arrays["san_offsets"] = pack_strings(sans)
+    arrays["fen"], arrays["fen_offsets"] = pack_strings(fens)
+    arrays["error"], arrays["error_offsets"] = pack_strings(errors)
+    meta = {
+        "version": FORMAT_VERSION,
+        "source_sha256": source_sha256,
+        "rows": len(df),
+        "plies": int(line_offsets[-1]),
+        "columns": TEXT_COLUMNS,
+    }
+    return arrays, meta
+
+
+def write_catalogue(arrays, meta, path):
+    """Writes the catalogue directory atomically (build aside, then swap in)."""
+    parent = os.path.dirname(os.path.abspath(path))
+    staging = tempfile.mkdtemp(prefix=".catalogue-", dir=parent)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f"{name}.npy"), array)
+        with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as handle:
+            json.dump(meta, handle, indent=2)
+        if os.path.isdir(path):
+            retired = path + f".old-{os.getpid()}"
+            os.replace(path, retired)
+            os.replace(staging, path)
+            shutil.rmtree(retired, ignore_errors=True)
+        else:
+            os.replace(staging, path)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+def read_meta(path):
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+class Catalogue:
+    """Read access to a compiled catalogue, memory-mapped or held in memory."""
+
+    def __init__(self, arrays, meta):
+        self.arrays = arrays
+        self.meta = meta
+
+    @classmethod
+    def load(cls, path):
+        meta = read_meta(path)
+        if meta is None:
+            raise FileNotFoundError(f"No compiled catalogue at {path}")
+        arrays = {}
+        for filename in os.listdir(path):
+            if filename.endswith(".npy"):
+                arrays[filename[:-4]] = np.load(os.path.join(path, filename), mmap_mode="r")
+        return cls(arrays, meta)
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    def text(self, column):
+        return unpack_strings(self.arrays[f"text_{column}"], self.arrays[f"text_{column}_offsets"])
+
+    def frame(self):
+        """The catalogue as the DataFrame `load_data()` has always returned."""
+        return pd.DataFrame({column: self.text(column) for column in self.meta["columns"]})
+
+    def lines(self):
+        """Every row as an `OpeningLine`, decoded from the per-ply arrays without any SAN parsing."""
+        offsets = self.arrays["line_offsets"].tolist()
+        moves = self.arrays["moves"].tolist()
+        keys = self.arrays["keys"].tolist()
+        sans = unpack_strings(self.arrays["san"], self.arrays["san_offsets"])
+        fens = unpack_strings(self.arrays["fen"], self.arrays["fen_offsets"])
+        errors = unpack_strings(self.arrays["error"], self.arrays["error_offsets"])
+        start_key = position_key(chess.Board())
+        lines = []
+        for row in range(len(self)):
+            a, b = offsets[row], offsets[row + 1]
+            lines.append(OpeningLine(
+                row,
+                sans[a:b],
+                [code_to_uci(code) for code in moves[a:b]],
+                [START_FEN] + fens[a:b],
+                [start_key] + keys[a:b],
+                errors[row] or None,
+            ))
+        return lines
+
+    def opening_index(self):
+        return OpeningIndex.from_compiled(self.lines())
+
+
+def build_catalogue(csv_path, path=None, on_progress=None):
+    """Compiles `csv_path` and writes it to `path` (next to the CSV by default)."""
+    path = path or catalogue_path_for(csv_path)
+    arrays, meta = compile_catalogue(pd.read_csv(csv_path), file_sha256(csv_path), on_progress)
+    write_catalogue(arrays, meta, path)
+    return path
+
+
+def catalogue_is_current(csv_path=DEFAULT_CSV, path=None):
+    """Whether `open_catalogue` would load without compiling (the catalogue matches the CSV, or there is no CSV)."""
+    path = path or catalogue_path_for(csv_path)
+    if not os.path.exists(csv_path):
+        return True
+    meta = read_meta(path)
+    return bool(meta) and meta.get("version") == FORMAT_VERSION and meta.get("source_sha256") == file_sha256(csv_path)
+
+
+def open_catalogue(csv_path=DEFAULT_CSV, path=None):
+    """Loads the compiled catalogue for `csv_path`, rebuilding it first if the CSV changed.
+
+    If only the compiled catalogue is shipped (no CSV), it is loaded as is. If
+    the catalogue directory cannot be written, the compiled arrays are kept in
+    memory for this process instead. Raises FileNotFoundError if neither exists.
+    """
+    path = path or catalogue_path_for(csv_path)
+    if not os.path.exists(csv_path):
+        return Catalogue.load(path)
+    checksum = file_sha256(csv_path)
+    meta = read_meta(path)
+    if meta and meta.get("version") == FORMAT_VERSION and meta.get("source_sha256") == checksum:
+        return Catalogue.load(path)
+    arrays, meta = compile_catalogue(pd.read_csv(csv_path), checksum)
+    try:
+        write_catalogue(arrays, meta, path)
+    except OSError:
+        return Catalogue(arrays, meta)
+    return Catalogue.load(path)
+
@@ -0,0 +1,56 @@
+"""
+Position-to-opening classification on top of the compiled `OpeningIndex`.
+
+The classifier keeps one precomputed map from Zobrist key to the deepest
+catalogue entry that ends in that position. A game is labelled ply by ply: a
+position found in the map gets that entry, any other position inherits the
+label of the previous ply (the game has left the book, or is between two named
+positions). Labelling a new move is therefore a single dictionary hit.
+"""
+import chess
+
+from .index import position_key
+
+
+class OpeningClassifier:
+    """Maps positions to the row of the deepest catalogue line ending there."""
+
+    def __init__(self, index):
+        self.index = index
+        self.by_key = {}
+        for key, node in index.nodes.items():
+            if node.openings:
+                # Several rows can end in the same position (duplicates or transpositions):
+                # prefer the longest line, then the first row in catalogue order.
+                self.by_key[key] = max(node.openings, key=lambda row: (len(index.line(row)), -row))
+
+    def classify_position(self, position):
+        """Row of the opening named for exactly this position (board or key), or None."""
+        if isinstance(position, chess.Board):
+            position = position_key(position)
+        return self.by_key.get(position)
+
+    def next_label(self, board, previous_label=None):
+        """Label for `board` (or its key) given the label of the ply before it."""
+        row = self.classify_position(board)
+        return previous_label if row is None else row
+
+    def label_moves(self, moves, board=None):
+        """Labels every ply of a move sequence.
+
+        `moves` may hold `chess.Move` objects or SAN strings. Returns a list one
+        longer than `moves`: entry `i` is the label after `i` plies.
+        """
+        board = board.copy(stack=False) if board is not None else chess.Board()
+        labels = [self.classify_position(board)]
+        for move in moves:
+            if isinstance(move, str):
+                board.push_san(move)
+            else:
+                board.push(move)
+            labels.append(self.next_label(board, labels[-1]))
+        return labels
+
+    def classify_game(self, moves, board=None):
+        """Deepest opening reached anywhere in a game, or None."""
+        return self.label_moves(moves, board)[-1]
@@ -0,0 +1,235 @@
+"""
+Command-line entry point for batch jobs: `python -m openings <command>`.
+
+Commands:
+  build-catalogue   compile the openings CSV into the binary catalogue
+  validate          check every line of the openings CSV and write a cleaned copy
+  classify          classify every game of a PGN file and write the ECO/result report
+  opening           name the opening reached by a move sequence
+  explore           list the continuations of a position, with game statistics from a PGN file
+  export            write catalogue opening lines as a multi-game PGN file
+  evaluate          pre-compute engine evaluations of every opening's final position
+"""
+import argparse
+import os
+import sys
+
+from .catalogue import DEFAULT_CSV
+
+
+def _load(csv_path):
+    from .catalogue import open_catalogue
+    catalogue = open_catalogue(csv_path)
+    return catalogue, catalogue.opening_index()
+
+
+def cmd_build_catalogue(args):
+    from .catalogue import build_catalogue, read_meta
+    path = build_catalogue(args.source or args.csv, args.output)
+    meta = read_meta(path)
+    print(f"Wrote {path}: {meta['rows']} openings, {meta['plies']} plies")
+    return 0
+
+
+def cmd_validate(args):
+    import pandas as pd
+    from .validate import ERROR, INFO, WARNING, validate_catalogue
+    df = pd.read_csv(args.source or args.csv)
+    result = validate_catalogue(df, workers=args.workers)
+    issues = result.issues_frame()
+    if args.issues:
+        issues.to_csv(args.issues, index=False)
+    else:
+        shown = issues if args.all else issues[issues["Severity"] != INFO]
+        if len(shown):
+            print(shown.to_string(index=False))
+    if args.output:
+        cleaned = result.cleaned()
+        cleaned.to_csv(args.output, index=False)
+        print(f"Wrote {args.output}: {len(cleaned)} of {len(df)} openings", file=sys.stderr)
+    print(f"{len(df)} openings: {result.count(ERROR)} errors, {result.count(WARNING)} warnings, "
+          f"{result.count(INFO)} transpositions", file=sys.stderr)
+    return 1 if result.errors else 0
+
+
+def cmd_classify(args):
+    from .parallel import PARALLEL_THRESHOLD_BYTES
+    workers = args.workers
+    if workers is None:
+        large = os.path.getsize(args.pgn) >= PARALLEL_THRESHOLD_BYTES
+        workers = (os.cpu_count() or 1) if large and args.max_games is None else 1
+    if workers > 1 and args.max_games is not None:
+        print("error: --max-games needs a single process; drop --workers or pass --workers 1", file=sys.stderr)
+        return 2
+    from .ingest import ingest_pgn
+    if args.headers_only:
+        # The games' own tags are counted, so the catalogue is not needed
+        with open(args.pgn, "rb") as handle:
+            report = ingest_pgn(handle, max_games=args.max_games)
+    elif workers > 1:
+        from .catalogue import open_catalogue
+        from .parallel import ParallelPgnAnalyser
+        open_catalogue(args.csv)  # compiled once here; each worker then loads it and builds its own index
+        analyser = ParallelPgnAnalyser(args.csv, max_workers=workers)
+        try:
+            report = analyser.analyse(args.pgn)
+        finally:
+            analyser.shutdown()
+    else:
+        from .classifier import OpeningClassifier
+        catalogue, index = _load(args.csv)
+        with open(args.pgn, "rb") as handle:
+            report = ingest_pgn(handle, OpeningClassifier(index), catalogue.frame(), max_games=args.max_games)
+
+    frame = report.to_frame()
+    if args.output and args.output.endswith(".json"):
+        frame.to_json(args.output, orient="records", indent=2, force_ascii=False)
+    else:
+        frame.to_csv(args.output or sys.stdout, index=False)
+    print(f"{report.games} games, {report.errors} with parse errors, {report.skipped} from custom positions",
+          file=sys.stderr)
+    return 0
+
+
+def cmd_opening(args):
+    import chess
+    from .classifier import OpeningClassifier
+    from .index import SAN_ERRORS, tokenize_moves
+    catalogue, index = _load(args.csv)
+    board = chess.Board()
+    try:
+        moves = [board.push_san(token) for token in tokenize_moves(" ".join(args.moves))]
+    except SAN_ERRORS as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    row = OpeningClassifier(index).classify_game(moves)
+    if row is None:
+        print("Unclassified")
+        return 1
+    print(f"{catalogue.text('ECO')[row]}\t{catalogue.text('Name')[row]}")
+    return 0
+
+
+def cmd_explore(args):
+    import chess
+    from .explorer import OpeningExplorer
+    from .index import SAN_ERRORS, tokenize_moves
+    catalogue, index = _load(args.csv)
+    df = catalogue.frame()
+    board = chess.Board()
+    try:
+        for token in tokenize_moves(" ".join(args.moves)):
+            board.push_san(token)
+    except SAN_ERRORS as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    explorer = OpeningExplorer(index)
+    if args.pgn:
+        from .classifier import OpeningClassifier
+        from .ingest import ingest_pgn
+        plies = max(args.plies, len(board.move_stack) + 1)
+        with open(args.pgn, "rb") as handle:
+            report = ingest_pgn(handle, OpeningClassifier(index), df, explorer_plies=plies)
+        explorer = explorer.with_games(report.tree)
+    print(explorer.to_frame(board, df).to_string(index=False))
+    return 0
+
+
+def cmd_export(args):
+    from .export import export_openings
+    from .search import OpeningSearch
+    catalogue, index = _load(args.csv)
+    df = catalogue.frame()
+    rows, _ = OpeningSearch(df, index).search(eco=args.eco, name_query=args.name or "", moves_query=args.moves or "")
+    if rows is None:
+        print("error: the --moves sequence cannot be played", file=sys.stderr)
+        return 2
+    if args.output == "-":
+        count = export_openings(df, index, rows, sys.stdout)
+    else:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            count = export_openings(df, index, rows, handle)
+    print(f"Exported {count} opening lines", file=sys.stderr)
+    return 0
+
+
+def cmd_evaluate(args):
+    from .cache import SqliteBackend
+    from .engine import DEFAULT_CACHE_PATH, DEFAULT_DEPTH, DEFAULT_WORKERS, STUB_COMMAND, EnginePool, find_engine
+    command = args.engine or find_engine()
+    if command is None:
+        print("error: no engine found; install stockfish or pass --engine (\"stub\" for the stub engine)", file=sys.stderr)
+        return 2
+    if command == "stub":
+        command = STUB_COMMAND
+    _, index = _load(args.csv)
+    boards = [line.board_at(len(line)) for line in index.lines]
+    depth = args.depth or DEFAULT_DEPTH
+    db = args.db or DEFAULT_CACHE_PATH
+    pool = EnginePool(command, workers=args.workers or DEFAULT_WORKERS, depth=depth, cache=SqliteBackend(db))
+    try:
+        analysed = pool.evaluate_many(boards)
+    finally:
+        pool.close()
+    print(f"{len(boards)} openings: {analysed} positions analysed by {pool.name} at depth {depth}, "
+          f"the rest were cached in {db}", file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m openings", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="openings catalogue CSV (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build-catalogue", help="compile the CSV into the binary catalogue")
+    build.add_argument("source", nargs="?", metavar="csv", help="openings CSV (default: the global --csv)")
+    build.add_argument("--output", help="catalogue directory (default: next to the CSV)")
+    build.set_defaults(func=cmd_build_catalogue)
+
+    validate = commands.add_parser("validate", help="check every line of the CSV and write a cleaned copy")
+    validate.add_argument("source", nargs="?", metavar="csv", help="openings CSV (default: the global --csv)")
+    validate.add_argument("--output", help="write the cleaned catalogue, with SAN/UCI/FEN columns, to this CSV")
+    validate.add_argument("--issues", help="write every issue to this CSV instead of printing errors and warnings")
+    validate.add_argument("--all", action="store_true", help="also print transpositions")
+    validate.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: %(default)s)")
+    validate.set_defaults(func=cmd_validate)
+
+    classify = commands.add_parser("classify", help="classify every game of a PGN file")
+    classify.add_argument("pgn")
+    classify.add_argument("--output", help="write the report to this .csv or .json file (default: CSV on stdout)")
+    classify.add_argument("--workers", type=int,
+                          help="worker processes (default: one per core for files of 4 MiB or more, else one)")
+    classify.add_argument("--headers-only", action="store_true", help="count the games' own ECO/Opening tags")
+    classify.add_argument("--max-games", type=int, help="stop after this many games (single process only)")
+    classify.set_defaults(func=cmd_classify)
+
+    opening = commands.add_parser("opening", help="name the opening reached by a move sequence")
+    opening.add_argument("moves", nargs="+", help='e.g. "1. e4 c5 2. Nf3"')
+    opening.set_defaults(func=cmd_opening)
+
+    explore = commands.add_parser("explore", help="list the continuations of a position")
+    explore.add_argument("moves", nargs="*", help='moves from the initial position, e.g. "1. e4 c5"')
+    explore.add_argument("--pgn", help="add win/draw/loss statistics from the games of this PGN file")
+    explore.add_argument("--plies", type=int, default=16, help="plies per game counted from --pgn (default: %(default)s)")
+    explore.set_defaults(func=cmd_explore)
+
+    export = commands.add_parser("export", help="write catalogue opening lines as PGN")
+    export.add_argument("output", help="output .pgn file, or - for stdout")
+    export.add_argument("--eco", help="ECO code or family prefix, e.g. B or C4")
+    export.add_argument("--name", help="name substring")
+    export.add_argument("--moves", help="only lines passing through the position after these moves")
+    export.set_defaults(func=cmd_export)
+
+    # Defaults come from openings/engine.py, imported only when the command runs
+    evaluate = commands.add_parser("evaluate", help="pre-compute engine evaluations of every opening's final position")
+    evaluate.add_argument("--engine", help='UCI engine command (default: DASHBOARD_ENGINE or stockfish; "stub" for the stub engine)')
+    evaluate.add_argument("--depth", type=int, help="search depth (default: 16)")
+    evaluate.add_argument("--workers", type=int, help="engine processes (default: 2)")
+    evaluate.add_argument("--db", help="evaluation cache file (default: evaluations.sqlite)")
+    evaluate.set_defaults(func=cmd_evaluate)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
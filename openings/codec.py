@@ -0,0 +1,34 @@
+"""
+16-bit packing of chess moves.
+
+A move fits in 15 bits: from-square (6), to-square (6) and promotion piece type
+(3, zero for none). Packed moves are stored as `uint16` arrays in the binary
+catalogue.
+"""
+import functools
+
+import chess
+import numpy as np
+
+
+def pack_move(move):
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def unpack_move(code):
+    code = int(code)
+    return chess.Move(code & 0x3F, (code >> 6) & 0x3F, (code >> 12) or None)
+
+
+@functools.lru_cache(maxsize=None)
+def code_to_uci(code):
+    """UCI string of a packed move; memoised, there are fewer than 2**15 distinct codes."""
+    return unpack_move(code).uci()
+
+
+def pack_moves(moves):
+    return np.fromiter((pack_move(move) for move in moves), dtype=np.uint16)
+
+
+def unpack_moves(codes):
+    return [unpack_move(code) for code in codes]
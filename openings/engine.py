@@ -0,0 +1,193 @@
+"""
+Optional engine evaluation of positions, with a persistent cache.
+
+An `EnginePool` starts a fixed number of UCI engine processes (Stockfish, or
+`python -m openings.stub_engine` for trying things out) through
+`chess.engine`'s asyncio API, on an event loop running in a background thread
+of its own. Requests from any thread wait for a free engine, so there are
+never more analyses running than engines. Evaluations are stored in a
+`SqliteBackend` file keyed by (Zobrist key, depth) under a namespace per
+engine, so a position is analysed once per engine and depth, across sessions,
+server processes and restarts. `evaluate_many` fills the cache for a batch of
+positions, e.g. every catalogue line's final position.
+"""
+import asyncio
+import concurrent.futures
+import os
+import shlex
+import shutil
+import sys
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import chess
+import chess.engine
+
+from .cache import SqliteBackend
+from .index import position_key
+
+DEFAULT_DEPTH = 16
+DEFAULT_WORKERS = 2
+DEFAULT_CACHE_PATH = "evaluations.sqlite"
+# Run by path, so it starts whatever the working directory
+STUB_COMMAND = f"{shlex.quote(sys.executable)} {shlex.quote(str(Path(__file__).with_name('stub_engine.py')))}"
+
+
+@dataclass
+class Evaluation:
+    """An engine's verdict on a position, from White's point of view."""
+    depth: int
+    centipawns: int = None  # None when there is a forced mate
+    mate: int = None  # moves to mate, negative when Black mates
+    pv: list = field(default_factory=list)  # principal variation in UCI
+
+    @property
+    def best_move(self):
+        return self.pv[0] if self.pv else None
+
+    def describe(self):
+        if self.mate == 0:
+            return "Checkmate"
+        if self.mate is not None:
+            return f"#{self.mate}" if self.mate >= 0 else f"#-{-self.mate}"
+        return f"{self.centipawns / 100:+.2f}"
+
+
+def find_engine():
+    """The engine command from DASHBOARD_ENGINE, or `stockfish` if it is on the PATH, else None."""
+    command = os.environ.get("DASHBOARD_ENGINE")
+    if command:
+        return STUB_COMMAND if command == "stub" else command
+    return shutil.which("stockfish")
+
+
+class EnginePool:
+    """`workers` engine processes behind one evaluation cache, usable from any thread."""
+
+    def __init__(self, command, workers=DEFAULT_WORKERS, depth=DEFAULT_DEPTH, cache=None, options=None):
+        self.command = command
+        self.workers = workers
+        self.depth = depth
+        self.cache = cache if cache is not None else SqliteBackend(DEFAULT_CACHE_PATH)
+        self.analysed = 0
+        self.cache_hits = 0
+        self._pending = {}  # (key, depth) -> future of an analysis in progress, shared by its requesters
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="openings-engines", daemon=True)
+        self._thread.start()
+        self._engines = []
+        try:
+            self.name = self._call(self._start(options or {}))
+        except BaseException:
+            self.close()
+            raise
+        self.namespace = f"evaluation:{self.name}"
+
+    def _call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    async def _start(self, options):
+        self._idle = asyncio.Queue()
+        for _ in range(self.workers):
+            _, engine = await chess.engine.popen_uci(shlex.split(self.command))
+            if options:
+                await engine.configure(options)
+            self._engines.append(engine)
+            self._idle.put_nowait(engine)
+        return self._engines[0].id.get("name", os.path.basename(shlex.split(self.command)[0]))
+
+    async def _analyse(self, fen, depth):
+        engine = await self._idle.get()
+        try:
+            info = await engine.analyse(chess.Board(fen), chess.engine.Limit(depth=depth))
+        finally:
+            self._idle.put_nowait(engine)
+        score = info["score"].white()
+        return Evaluation(
+            depth=info.get("depth", depth),
+            centipawns=score.score(),
+            mate=score.mate(),
+            pv=[move.uci() for move in info.get("pv", [])])
+
+    def cached(self, board, depth=None):
+        """The stored evaluation of `board` at `depth`, or None; never starts an analysis."""
+        return self.cache.get(self.namespace, (position_key(board), depth or self.depth))
+
+    def submit(self, board, depth=None):
+        """A `concurrent.futures.Future` of the evaluation of `board`, resolved at once when cached.
+
+        The future may be shared with other callers asking for the same position;
+        do not cancel it.
+        """
+        return self._submit(board, depth)[0]
+
+    def _submit(self, board, depth=None):
+        """(future, started): `started` is True when this call started the analysis."""
+        depth = depth or self.depth
+        key = (position_key(board), depth)
+        evaluation = self.cache.get(self.namespace, key)
+        if evaluation is not None:
+            self.cache_hits += 1
+            future = concurrent.futures.Future()
+            future.set_result(evaluation)
+            return future, False
+        with self._lock:
+            future = self._pending.get(key)
+            started = future is None
+            if started:
+                future = self._pending[key] = asyncio.run_coroutine_threadsafe(self._analyse(board.fen(), depth), self._loop)
+        # Outside the lock: a callback added to a finished future runs at once, and _store takes the lock
+        if started:
+            future.add_done_callback(lambda done: self._store(key, done))
+        return future, started
+
+    def _store(self, key, future):
+        with self._lock:
+            self._pending.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            self.analysed += 1
+        self.cache.set(self.namespace, key, future.result())
+
+    def evaluate(self, board, depth=None, timeout=None):
+        """Evaluation of `board` at `depth` (default: the pool's), from the cache or the next free engine."""
+        return self.submit(board, depth).result(timeout)
+
+    def evaluate_many(self, boards, depth=None, on_progress=None):
+        """Evaluates `boards` (positions already cached are skipped) on every engine; returns how many this call analysed.
+
+        `on_progress(done, total)` is called as evaluations complete; an
+        exception it raises cancels the evaluations this call started and that
+        are still waiting (not those other callers were already waiting for).
+        """
+        submitted = [self._submit(board, depth) for board in boards]
+        futures = [future for future, _ in submitted]
+        started = {future for future, started in submitted if started}
+        analysed = 0
+        try:
+            for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                future.result()
+                analysed += future in started
+                if on_progress:
+                    on_progress(done, len(futures))
+        finally:
+            for future in started:
+                future.cancel()
+        return analysed
+
+    def stats(self):
+        return {"engines": len(self._engines), "analysed": self.analysed, "cache_hits": self.cache_hits}
+
+    def close(self):
+        async def quit_all():
+            for engine in self._engines:
+                try:
+                    await asyncio.wait_for(engine.quit(), 5)
+                except (chess.engine.EngineError, asyncio.TimeoutError):
+                    pass
+        if self._loop.is_running():
+            self._call(quit_all())
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(5)
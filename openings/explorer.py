@@ -0,0 +1,95 @@
+"""
+Opening explorer: the continuations of a position, with catalogue and game statistics.
+
+Both tables are keyed by Zobrist position key, so a query is one dictionary
+lookup per source and never scans the catalogue or replays lines:
+
+* the catalogue's continuations are the children of the position's node in the
+  `OpeningIndex`, with the number of catalogue lines through each child and the
+  openings that end there;
+* the games' continuations come from `IngestReport.tree`, a `GameTree` filled
+  while an upload is ingested with `explorer_plies` (see `openings/ingest.py`),
+  with White/draw/Black counts per move; it is looked up once per legal move.
+
+Moves played in games but absent from the catalogue are listed too. A game
+tree that is still being filled by a background job is read under its lock.
+"""
+import contextlib
+from dataclasses import dataclass, field
+
+from .index import position_key
+from .ingest import GameTree
+
+
+@dataclass
+class Continuation:
+    """One move from the queried position."""
+    uci: str
+    san: str
+    lines: int = 0  # catalogue lines that continue with this move
+    openings: list = field(default_factory=list)  # catalogue rows whose line ends right after it
+    white: int = 0
+    draws: int = 0
+    black: int = 0
+    other: int = 0  # unfinished or unknown results
+
+    @property
+    def games(self):
+        return self.white + self.draws + self.black + self.other
+
+    def percentages(self):
+        """(White wins, draws, Black wins) in percent of the games, or None without games."""
+        games = self.games
+        if not games:
+            return None
+        return tuple(round(100.0 * count / games, 1) for count in (self.white, self.draws, self.black))
+
+
+class OpeningExplorer:
+    """Continuations per position from the catalogue index and, optionally, a game tree."""
+
+    def __init__(self, index, tree=None, lock=None):
+        self.index = index
+        self.tree = tree if tree is not None else GameTree()
+        self.lock = lock
+
+    def with_games(self, tree, lock=None):
+        """The same catalogue with another game tree (e.g. the current upload's, guarded by `lock` while it grows)."""
+        return OpeningExplorer(self.index, tree, lock)
+
+    def continuations(self, board):
+        """Continuations of `board`'s position, most played first, then by catalogue lines."""
+        key = position_key(board)
+        moves = {}
+        node = self.index.node(key)
+        if node is not None:
+            for uci, (san, child_key) in node.children.items():
+                child = self.index.nodes[child_key]
+                moves[uci] = Continuation(uci, san, len(child.lines), list(child.openings))
+        with self.lock if self.lock is not None else contextlib.nullcontext():
+            played = self.tree.moves(board)
+        for move, (white, draws, black, other) in played:
+            uci = move.uci()
+            continuation = moves.get(uci)
+            if continuation is None:
+                continuation = moves[uci] = Continuation(uci, board.san(move))
+            continuation.white, continuation.draws, continuation.black, continuation.other = white, draws, black, other
+        return sorted(moves.values(), key=lambda c: (-c.games, -c.lines, c.san))
+
+    def to_frame(self, board, catalogue_df=None):
+        """The continuations as a table for display."""
+        import pandas as pd
+        rows = []
+        for continuation in self.continuations(board):
+            row = {"Move": continuation.san, "Catalogue lines": continuation.lines}
+            if catalogue_df is not None:
+                row["Opening"] = ", ".join(
+                    f"{catalogue_df.iloc[opening]['ECO']} {catalogue_df.iloc[opening]['Name']}"
+                    for opening in continuation.openings[:3])
+            row["Games"] = continuation.games
+            percentages = continuation.percentages() or (None, None, None)
+            row["White wins %"], row["Draws %"], row["Black wins %"] = percentages
+            rows.append(row)
+        columns = ["Move", "Catalogue lines"] + (["Opening"] if catalogue_df is not None else []) + [
+            "Games", "White wins %", "Draws %", "Black wins %"]
+        return pd.DataFrame(rows, columns=columns)
@@ -0,0 +1,163 @@
+"""
+PGN export of interactive games and catalogue opening lines.
+
+Games are assembled from already validated `chess.Move` objects, so no SAN is
+re-parsed, and several games can be streamed into one file handle one at a
+time. The interactive game's PGN is kept by `IncrementalPgn`, which appends
+the movetext of new moves only and memoises the text on the history version.
+"""
+import datetime
+from array import array
+
+import chess
+import chess.pgn
+
+from .ingest import text_stream
+
+
+def interactive_headers(date=None):
+    """The Seven Tag Roster used for games played on the dashboard's interactive board."""
+    date = date or datetime.date.today()
+    return {
+        "Event": "Interactive Session",
+        "Site": "Chess Openings Dashboard",
+        "Date": date.strftime("%Y.%m.%d"),
+        "Round": "-",
+        "White": "Player1",
+        "Black": "Player2",
+        "Result": "*",  # Game is ongoing or result unknown
+    }
+
+
+def game_from_moves(moves, headers=None, board=None):
+    """A `chess.pgn.Game` holding `moves` as its mainline, played from `board` (default: initial position)."""
+    game = chess.pgn.Game()
+    if board is not None:
+        game.setup(board)
+    for tag, value in (headers or {}).items():
+        game.headers[tag] = value
+    node = game
+    for move in moves:
+        node = node.add_variation(move)
+    return game
+
+
+def opening_game(opening, line):
+    """PGN game for one catalogue row (`opening` is the row, `line` its compiled `OpeningLine`)."""
+    headers = {
+        "Event": "Chess Openings Dashboard",
+        "Site": "?",
+        "Date": "????.??.??",
+        "Round": "-",
+        "White": "?",
+        "Black": "?",
+        "Result": "*",
+        "ECO": opening["ECO"],
+        "Opening": opening["Name"],
+    }
+    game = game_from_moves((chess.Move.from_uci(uci) for uci in line.ucis), headers)
+    if isinstance(opening.get("Description"), str) and opening["Description"]:
+        game.comment = opening["Description"]
+    return game
+
+
+class IncrementalPgn:
+    """PGN text of a `MoveHistory` main line, extended move by move as the history grows.
+
+    The movetext is kept as one string with the offset where each ply's tokens
+    end, so new moves only add their own tokens and a branch cuts the text at
+    the branch point; no board is copied and no SAN is parsed. `render()` is
+    memoised on the history version.
+    """
+
+    def __init__(self):
+        self.start_fen = None
+        self.codes = array("H")  # packed moves already in the movetext
+        self.movetext = ""  # "1. e4 e5 2. Nf3 ..." with a trailing space
+        self.ends = array("I")  # ends[ply] = length of the movetext up to and including that ply
+        self._memo = (None, None)
+
+    def sync(self, history):
+        """Brings the movetext in line with `history`, redoing only the moves after the first difference."""
+        start_fen = history.snapshots[0]
+        if start_fen != self.start_fen:
+            self.__init__()
+            self.start_fen = start_fen
+        keep = len(self.codes)
+        if history.codes[:keep] != self.codes:
+            keep = 0
+            for ours, theirs in zip(self.codes, history.codes):
+                if ours != theirs:
+                    break
+                keep += 1
+        del self.codes[keep:]
+        del self.ends[keep:]
+        self.movetext = self.movetext[:self.ends[-1] if keep else 0]
+        start = chess.Board(start_fen)
+        black_first = start.turn == chess.BLACK
+        tokens = []
+        length = len(self.movetext)
+        for ply, san in enumerate(history.sans_from(keep), keep):
+            number = start.fullmove_number + (ply + black_first) // 2
+            if (ply + black_first) % 2 == 0:
+                tokens.append(f"{number}. {san} ")
+            elif ply == 0:
+                tokens.append(f"{number}... {san} ")
+            else:
+                tokens.append(f"{san} ")
+            length += len(tokens[-1])
+            self.ends.append(length)
+        self.codes.extend(history.codes[keep:])
+        self.movetext += "".join(tokens)
+
+    def render(self, history, headers):
+        """The PGN of `history` with `headers`; the same text as `str(game_from_moves(...))`."""
+        key = (history.token, history.version, tuple(headers.items()))
+        if self._memo[0] == key:
+            return self._memo[1]
+        self.sync(history)
+        tags = chess.pgn.Headers(headers)
+        if self.start_fen != chess.STARTING_FEN:
+            tags["FEN"] = self.start_fen
+            tags["SetUp"] = "1"
+        header_lines = "".join(f'[{tag} "{value}"]\n' for tag, value in tags.items())
+        text = f"{header_lines}\n{self.movetext}{tags.get('Result', '*')}"
+        self._memo = (key, text)
+        return text
+
+
+def write_games(games, handle):
+    """Writes games one after another, separated by blank lines; returns how many were written."""
+    count = 0
+    for game in games:
+        exporter = chess.pgn.FileExporter(handle)
+        game.accept(exporter)
+        count += 1
+    return count
+
+
+def export_openings(df, index, rows, handle):
+    """Streams the catalogue lines at positions `rows` of `df` to `handle` as PGN."""
+    return write_games((opening_game(df.iloc[row], index.line(row)) for row in rows), handle)
+
+
+def classified_games(binary, classifier, catalogue_df):
+    """Every game of a PGN upload, with `ECO`/`Opening` tags set from the catalogue classification."""
+    handle = text_stream(binary)
+    try:
+        while True:
+            game = chess.pgn.read_game(handle)
+            if game is None:
+                return
+            row = classifier.classify_game(game.mainline_moves(), game.board())
+            if row is not None:
+                game.headers["ECO"] = catalogue_df.iloc[row]["ECO"]
+                game.headers["Opening"] = catalogue_df.iloc[row]["Name"]
+            yield game
+    finally:
+        handle.detach()
+
+
+def export_classified_games(binary, classifier, catalogue_df, handle):
+    """Streams every game of `binary` to `handle`, tagged with its catalogue opening."""
+    return write_games(classified_games(binary, classifier, catalogue_df), handle)
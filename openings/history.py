@@ -0,0 +1,123 @@
+"""
+Cursor-based move history for the interactive board.
+
+Histories live in every session's state, so they are kept compact: moves are
+16-bit packed codes in an `array('H')` (see `openings/codec.py`) and their SAN
+is one space-separated string, about 7 bytes per ply in all. Only the board
+at the cursor is held, without a move stack; stepping forward pushes one move
+on it. Every `SNAPSHOT_EVERY` plies a FEN snapshot is recorded, and going back
+or jumping to an arbitrary ply restarts from the nearest snapshot and replays
+at most `SNAPSHOT_EVERY` moves. `version` changes whenever the moves do (not
+when the cursor moves), so derived data such as the PGN export can be memoised
+on (`token`, `version`); `token` is unique to each history of the process.
+"""
+import itertools
+from array import array
+
+import chess
+
+from .codec import pack_move, unpack_move
+
+SNAPSHOT_EVERY = 16
+_tokens = itertools.count()
+
+
+class MoveHistory:
+    """Main line of moves with a cursor and a board positioned at the cursor."""
+
+    def __init__(self, board=None):
+        start = board.copy(stack=False) if board is not None else chess.Board()
+        self.codes = array("H")  # packed moves, one per ply
+        self.san_text = ""  # SAN of every move, separated by spaces
+        self.snapshots = [start.fen()]  # snapshots[i] is the position after i * SNAPSHOT_EVERY plies
+        self.board = start  # position at the cursor, with no move stack
+        self.cursor = 0
+        self.version = 0
+        self.token = next(_tokens)  # unlike id(), never reused by a later history
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def at_end(self):
+        return self.cursor == len(self.codes)
+
+    @property
+    def moves(self):
+        """The moves as `chess.Move` objects (decoded on each access)."""
+        return [unpack_move(code) for code in self.codes]
+
+    @property
+    def sans(self):
+        return self.san_text.split()
+
+    def sans_from(self, ply):
+        """SAN of the moves from `ply` on, splitting only that tail of the SAN string."""
+        count = len(self.codes) - ply
+        if count <= 0:
+            return []
+        return self.san_text.rsplit(" ", count)[-count:]
+
+    @property
+    def last_move(self):
+        return unpack_move(self.codes[self.cursor - 1]) if self.cursor > 0 else None
+
+    def push_san(self, san):
+        """Parses `san` in the current position and plays it; returns the `chess.Move`.
+
+        If the cursor is not at the end, the moves after it are discarded first
+        (the new move starts a new branch). Raises the usual python-chess
+        `ValueError` subclasses for invalid, illegal or ambiguous SAN.
+        """
+        return self.push(self.board.parse_san(san))
+
+    def push(self, move):
+        if not self.at_end:
+            self.truncate()
+        san = self.board.san(move)
+        self.san_text = f"{self.san_text} {san}" if self.san_text else san
+        self._play(move)
+        self.codes.append(pack_move(move))
+        self.version += 1
+        self.cursor += 1
+        if self.cursor % SNAPSHOT_EVERY == 0:
+            self.snapshots.append(self.board.fen())
+        return move
+
+    def extend(self, moves):
+        for move in moves:
+            self.push(move)
+
+    def truncate(self):
+        """Drops every move after the cursor."""
+        self.version += 1
+        del self.codes[self.cursor:]
+        self.san_text = " ".join(self.sans[:self.cursor])
+        del self.snapshots[self.cursor // SNAPSHOT_EVERY + 1:]
+
+    def _play(self, move):
+        self.board.push(move)
+        self.board.clear_stack()
+
+    def back(self):
+        if self.cursor > 0:
+            self.jump(self.cursor - 1)
+
+    def forward(self):
+        if self.at_end:
+            return
+        self._play(unpack_move(self.codes[self.cursor]))
+        self.cursor += 1
+
+    def jump(self, ply):
+        """Moves the cursor to `ply` (clamped to the history)."""
+        ply = max(0, min(ply, len(self.codes)))
+        if not self.cursor <= ply <= self.cursor + SNAPSHOT_EVERY:
+            snapshot = ply // SNAPSHOT_EVERY
+            self.board = chess.Board(self.snapshots[snapshot])
+            self.cursor = snapshot * SNAPSHOT_EVERY
+        while self.cursor < ply:
+            self.forward()
+
+    def rewind(self):
+        self.jump(0)
@@ -0,0 +1,166 @@
+"""
+Load-time compiler for the openings catalogue.
+
+Every `Moves` string in `chess_openings.csv` is parsed exactly once into SAN,
+UCI, per-ply FENs and Zobrist keys. The positions are merged into a single
+opening tree keyed by `chess.polyglot.zobrist_hash`, so two move orders that
+reach the same position share one node (transpositions). Board navigation and
+"which opening is this position" lookups are then plain dictionary hits.
+"""
+import re
+from dataclasses import dataclass, field
+
+import chess
+import chess.polyglot
+
+# Move-number prefixes ("1.", "1...", "12.e4") and game-termination markers are
+# not SAN and have to be stripped before the tokens reach push_san.
+MOVE_NUMBER_RE = re.compile(r"^\d+\.+")
+RESULT_TOKENS = {"1-0", "0-1", "1/2-1/2", "*"}
+
+SAN_ERRORS = (chess.InvalidMoveError, chess.IllegalMoveError, chess.AmbiguousMoveError)
+
+
+def tokenize_moves(moves_str):
+    """Splits a catalogue `Moves` string into bare SAN tokens."""
+    if not isinstance(moves_str, str):
+        return []
+    tokens = []
+    for raw in moves_str.split():
+        token = MOVE_NUMBER_RE.sub("", raw)
+        if token and token not in RESULT_TOKENS:
+            tokens.append(token)
+    return tokens
+
+
+def position_key(board):
+    """Zobrist hash used as the key of every position in the index."""
+    return chess.polyglot.zobrist_hash(board)
+
+
+@dataclass
+class OpeningLine:
+    """One catalogue row compiled into per-ply data.
+
+    `fens[i]` and `keys[i]` describe the position after `i` plies, so both lists
+    are one longer than `sans`/`ucis`. If a token could not be played, the line
+    is truncated at the last legal ply and `error` explains why.
+    """
+    row: int
+    sans: list
+    ucis: list
+    fens: list
+    keys: list
+    error: str = None
+
+    def __len__(self):
+        return len(self.sans)
+
+    def board_at(self, ply):
+        """Returns a fresh board for the position after `ply` plies."""
+        return chess.Board(self.fens[ply])
+
+    def last_move_at(self, ply):
+        """Returns the move that led to the position after `ply` plies, if any."""
+        return chess.Move.from_uci(self.ucis[ply - 1]) if ply > 0 else None
+
+
+def compile_line(row, moves_str):
+    """Plays a `Moves` string from the initial position into an `OpeningLine`."""
+    board = chess.Board()
+    sans, ucis = [], []
+    fens, keys = [board.fen()], [position_key(board)]
+    error = None
+    for token in tokenize_moves(moves_str):
+        try:
+            move = board.parse_san(token)
+        except SAN_ERRORS as e:
+            error = f"Invalid move '{token}' at ply {len(sans) + 1}: {e}"
+            break
+        sans.append(board.san(move))
+        ucis.append(move.uci())
+        board.push(move)
+        fens.append(board.fen())
+        keys.append(position_key(board))
+    return OpeningLine(row, sans, ucis, fens, keys, error)
+
+
+@dataclass
+class PositionNode:
+    """A position of the opening tree, shared by every line that reaches it."""
+    key: int
+    fen: str
+    depth: int  # shortest ply count at which any catalogue line reaches it
+    children: dict = field(default_factory=dict)  # uci -> (san, child key)
+    openings: list = field(default_factory=list)  # rows whose line ends here
+    lines: list = field(default_factory=list)  # rows whose line passes through here
+
+
+class OpeningIndex:
+    """Transposition-aware tree of every catalogue line, built once per catalogue."""
+
+    def __init__(self):
+        self.lines = []
+        self.nodes = {}
+        root = chess.Board()
+        self.root_key = position_key(root)
+        self.nodes[self.root_key] = PositionNode(self.root_key, root.fen(), 0)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """Compiles the `Moves` column of `df` (rows in positional order)."""
+        index = cls()
+        if "Moves" in df.columns:
+            for row, moves_str in enumerate(df["Moves"].tolist()):
+                index.add_line(row, moves_str)
+        return index
+
+    @classmethod
+    def from_compiled(cls, lines):
+        """Builds the tree from already compiled `OpeningLine`s (e.g. a binary catalogue)."""
+        index = cls()
+        for line in lines:
+            index.add_compiled_line(line)
+        return index
+
+    def add_line(self, row, moves_str):
+        """Parses one `Moves` string and adds it to the tree."""
+        return self.add_compiled_line(compile_line(row, moves_str))
+
+    def add_compiled_line(self, line):
+        node = self.nodes[self.root_key]
+        node.lines.append(line.row)
+        for ply in range(1, len(line) + 1):
+            key = line.keys[ply]
+            child = self.nodes.get(key)
+            if child is None:
+                child = self.nodes[key] = PositionNode(key, line.fens[ply], ply)
+            else:
+                child.depth = min(child.depth, ply)
+            node.children.setdefault(line.ucis[ply - 1], (line.sans[ply - 1], key))
+            if not child.lines or child.lines[-1] != line.row:
+                child.lines.append(line.row)
+            node = child
+        node.openings.append(line.row)
+        self.lines.append(line)
+        return line
+
+    def __len__(self):
+        return len(self.lines)
+
+    def line(self, row):
+        return self.lines[row]
+
+    def node(self, position):
+        """Looks up a node by Zobrist key or by `chess.Board`; None if unknown."""
+        if isinstance(position, chess.Board):
+            position = position_key(position)
+        return self.nodes.get(position)
+
+    def openings_at(self, position):
+        """Rows of the catalogue whose line ends exactly at this position."""
+        node = self.node(position)
+        return list(node.openings) if node else []
+
+    def invalid_lines(self):
+        return [line for line in self.lines if line.error]
@@ -0,0 +1,271 @@
+"""
+Streaming ingestion of multi-game PGN files.
+
+Games are read one at a time from a binary buffer (such as a Streamlit
+`UploadedFile`) through a text wrapper, so the upload is never decoded into a
+second in-memory copy. Each game is parsed with a visitor that only follows the
+mainline while it is still inside the opening tree: variations are skipped,
+SAN parsing stops as soon as the game leaves book, and games that start from a
+custom position are skipped right after their headers. Only aggregate counts
+are kept, so memory stays flat no matter how many games the file holds.
+
+With `explorer_plies` set, the first plies of every game are also parsed (in
+book or not) and counted per (position, move) with their results, for the
+opening explorer (see `openings/explorer.py`). The counts are kept in a
+`GameTree`: one dict from a packed (position key, move) integer to a slot of a
+flat `array('I')`, about 150 bytes per pair. Once it holds more than
+`MAX_TREE_MOVES` pairs, only the most played half is kept, so its size stays
+bounded however many games are read.
+"""
+import contextlib
+import io
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+
+import chess
+import chess.pgn
+
+from .codec import pack_move, unpack_move
+from .index import position_key
+
+RESULTS = ("1-0", "1/2-1/2", "0-1")
+UNCLASSIFIED = ("?", "Unclassified")
+PROGRESS_EVERY = 250  # games between two progress callbacks
+EXPLORER_PLIES = 16  # plies per game counted for the explorer by the dashboard
+MAX_TREE_MOVES = 60_000  # (position, move) pairs kept in a game tree, about 9 MB
+START_KEY = position_key(chess.Board())
+
+
+class OpeningVisitor(chess.pgn.BaseVisitor):
+    """Classifies the mainline of one game without building a game tree.
+
+    With `classifier=None` only the headers are read (the `ECO`/`Opening` tags
+    are used) and the movetext is skipped entirely.
+    """
+
+    def __init__(self, classifier=None, explorer_plies=0):
+        self.classifier = classifier
+        self.known = classifier.index.nodes if classifier else {}
+        self.explorer_plies = explorer_plies if classifier else 0
+
+    def begin_game(self):
+        self.headers = {}
+        self.label = None
+        self.in_book = True
+        self.plies = 0
+        self.error = None
+        self.key = START_KEY
+        self.path = []  # (position key, packed move) of the first `explorer_plies` moves
+
+    def visit_header(self, tagname, tagvalue):
+        self.headers[tagname] = tagvalue
+
+    def end_headers(self):
+        if self.classifier is None or "FEN" in self.headers or "Variant" in self.headers:
+            return chess.pgn.SKIP
+        self.label = self.classifier.classify_position(chess.Board())
+
+    def begin_variation(self):
+        return chess.pgn.SKIP
+
+    def begin_parse_san(self, board, san):
+        self.plies += 1
+        if not self.in_book and self.plies > self.explorer_plies:
+            return chess.pgn.SKIP
+
+    def visit_move(self, board, move):
+        if self.plies <= self.explorer_plies:
+            self.path.append((self.key, pack_move(move)))
+
+    def visit_board(self, board):
+        if not self.in_book and self.plies >= self.explorer_plies:
+            return
+        key = self.key = position_key(board)
+        if not self.in_book:
+            return
+        if key not in self.known:
+            self.in_book = False
+            return
+        self.label = self.classifier.next_label(key, self.label)
+
+    def handle_error(self, error):
+        self.error = error
+
+    def result(self):
+        return self
+
+
+class GameTree:
+    """Game results per (position, move): [white wins, draws, black wins, other] for each pair."""
+
+    def __init__(self):
+        self.slots = {}  # position key << 16 | packed move -> slot
+        self.counts = array("I")  # four counts per slot
+
+    def __len__(self):
+        return len(self.slots)
+
+    def add(self, position, code, column, games=1):
+        pair = position << 16 | code
+        slot = self.slots.get(pair)
+        if slot is None:
+            slot = self.slots[pair] = len(self.counts) // 4
+            self.counts.extend((0, 0, 0, 0))
+        self.counts[slot * 4 + column] += games
+
+    def get(self, position, move):
+        """The four counts of `move` from `position`, or None if no game played it."""
+        slot = self.slots.get(position << 16 | pack_move(move))
+        return None if slot is None else tuple(self.counts[slot * 4:slot * 4 + 4])
+
+    def moves(self, board):
+        """(move, counts) for each legal move of `board` played in some game."""
+        key = position_key(board)
+        played = ((move, self.get(key, move)) for move in board.legal_moves)
+        return [(move, counts) for move, counts in played if counts is not None]
+
+    def items(self):
+        """(position key, move, counts) for every pair."""
+        for pair, slot in self.slots.items():
+            yield pair >> 16, unpack_move(pair & 0xFFFF), tuple(self.counts[slot * 4:slot * 4 + 4])
+
+    def merge(self, other):
+        for pair, slot in other.slots.items():
+            for column in range(4):
+                if other.counts[slot * 4 + column]:
+                    self.add(pair >> 16, pair & 0xFFFF, column, other.counts[slot * 4 + column])
+        return self
+
+    def prune(self, max_moves=MAX_TREE_MOVES):
+        """Above `max_moves` pairs, keeps the `max_moves // 2` most played ones (ties go to the lower pair)."""
+        if len(self.slots) <= max_moves:
+            return
+        counts = self.counts
+        ranked = sorted(self.slots.items(), key=lambda item: (-sum(counts[item[1] * 4:item[1] * 4 + 4]), item[0]))
+        slots, kept = {}, array("I")
+        for pair, slot in ranked[:max_moves // 2]:
+            slots[pair] = len(kept) // 4
+            kept.extend(counts[slot * 4:slot * 4 + 4])
+        self.slots, self.counts = slots, kept
+
+
+@dataclass
+class IngestReport:
+    """Aggregate opening/result statistics over every game of a PGN stream."""
+    games: int = 0
+    errors: int = 0
+    skipped: int = 0  # games from a custom start position, not classifiable
+    plies: int = 0
+    openings: Counter = field(default_factory=Counter)  # (eco, name) -> games
+    results: Counter = field(default_factory=Counter)  # (eco, name, result) -> games
+    tree: GameTree = field(default_factory=GameTree)  # results per (position, move) of the first plies
+
+    def add(self, eco, name, result, plies=0, path=()):
+        key = (eco, name)
+        self.games += 1
+        self.plies += plies
+        self.openings[key] += 1
+        self.results[key + (result if result in RESULTS else "*",)] += 1
+        column = RESULTS.index(result) if result in RESULTS else len(RESULTS)
+        for position, code in path:
+            self.tree.add(position, code, column)
+
+    def merge(self, other):
+        self.games += other.games
+        self.errors += other.errors
+        self.skipped += other.skipped
+        self.plies += other.plies
+        self.openings.update(other.openings)
+        self.results.update(other.results)
+        self.tree.merge(other.tree)
+        self.tree.prune()
+        return self
+
+    def to_frame(self):
+        """One row per opening with game counts and White/Draw/Black percentages."""
+        import pandas as pd
+        rows = []
+        for (eco, name), games in self.openings.most_common():
+            row = {"ECO": eco, "Name": name, "Games": games}
+            for result, column in zip(RESULTS, ("White wins %", "Draws %", "Black wins %")):
+                row[column] = round(100.0 * self.results[(eco, name, result)] / games, 1)
+            rows.append(row)
+        return pd.DataFrame(rows, columns=["ECO", "Name", "Games", "White wins %", "Draws %", "Black wins %"])
+
+    def eco_counts(self):
+        """Games per ECO code, for the sidebar chart."""
+        import pandas as pd
+        counts = Counter()
+        for (eco, _name), games in self.openings.items():
+            counts[eco] += games
+        return pd.Series(counts, dtype="int64").sort_index()
+
+
+def text_stream(binary):
+    """Wraps a binary buffer for chess.pgn without copying it. Call `.detach()` when done."""
+    binary.seek(0)
+    return io.TextIOWrapper(binary, encoding="utf-8-sig", errors="replace", newline="")
+
+
+def ingest_pgn(binary, classifier=None, catalogue_df=None, on_progress=None, max_games=None, explorer_plies=0,
+               report=None, lock=None):
+    """Streams every game from `binary` into an `IngestReport`.
+
+    `classifier` and `catalogue_df` turn classification rows into ECO/Name
+    labels; without a classifier the games' own `ECO`/`Opening` header tags are
+    counted instead (headers-only, the movetext is never parsed).
+    `on_progress(games, fraction)` is called periodically with the fraction of
+    bytes consumed so far; an exception it raises stops the ingestion.
+    `explorer_plies` > 0 fills `report.tree` (needs a classifier), pruned to
+    `MAX_TREE_MOVES` pairs as it grows.
+
+    Games are added to `report` (a new one by default) as they are read. With
+    a `lock`, each game is added while holding it, so other threads can read
+    the report while it grows.
+    """
+    binary.seek(0, io.SEEK_END)
+    total_bytes = binary.tell() or 1
+    handle = text_stream(binary)
+    visitor = OpeningVisitor(classifier, explorer_plies)
+    report = IngestReport() if report is None else report
+    guard = lock if lock is not None else contextlib.nullcontext()
+    start_games = report.games
+    labels = list(catalogue_df[["ECO", "Name"]].itertuples(index=False, name=None)) if catalogue_df is not None else []
+    try:
+        while max_games is None or report.games - start_games < max_games:
+            game = chess.pgn.read_game(handle, Visitor=lambda: visitor)
+            if game is None:
+                break
+            result = game.headers.get("Result", "*")
+            skipped = classifier is not None and ("FEN" in game.headers or "Variant" in game.headers)
+            if classifier is None:
+                eco, name = game.headers.get("ECO", "?"), game.headers.get("Opening", "Unknown")
+            elif skipped or game.label is None:
+                eco, name = UNCLASSIFIED
+            else:
+                eco, name = labels[game.label]
+            with guard:
+                report.errors += game.error is not None
+                report.skipped += skipped
+                report.add(eco, name, result, game.plies, game.path)
+            if report.games % PROGRESS_EVERY == 0:
+                if len(report.tree) > MAX_TREE_MOVES:
+                    with guard:
+                        report.tree.prune()
+                if on_progress:
+                    on_progress(report.games, min(binary.tell() / total_bytes, 1.0))
+    finally:
+        handle.detach()
+    if on_progress:
+        on_progress(report.games, 1.0)
+    return report
+
+
+def read_first_game(binary):
+    """Fully parsed first game of `binary` (for the interactive board), or None."""
+    handle = text_stream(binary)
+    try:
+        return chess.pgn.read_game(handle)
+    finally:
+        handle.detach()
@@ -0,0 +1,239 @@
+"""
+Per-rerun timing of the dashboard's sections.
+
+Streamlit re-executes the whole script on every interaction, so each run gets a
+`RerunProfiler` whose `section()` contexts time the named parts of the script.
+A section opened inside another is subtracted from it, so no time is counted
+twice in the totals.
+Finished runs are folded into a process-wide `MetricsRegistry` (shared by all
+sessions), which keeps per-section totals plus a short history of recent runs
+and renders them as JSON or Prometheus text exposition format.
+
+A run can optionally be captured with cProfile (the script thread only) and
+tracemalloc (process-wide allocation peak); both are meant for debugging and
+are off by default. `measure_session()` records the deep size of the
+session's state, which the registry aggregates over sessions.
+"""
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import types
+from collections import OrderedDict, deque
+
+RECENT_RUNS = 50
+RECENT_SESSIONS = 1000  # sessions whose last state size is kept; ended sessions age out
+# Not counted as session memory: code, and objects such as locks that only point at shared state
+_UNMEASURED = (types.ModuleType, type, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+               type(threading.Lock()), threading.Thread)
+
+
+def deep_size(value, seen=None):
+    """Bytes held by `value` and everything it references (containers, instance attributes and slots).
+
+    Objects already in `seen` (a set of ids, updated) are not counted again, so
+    several values can be measured without double counting what they share.
+    """
+    seen = set() if seen is None else seen
+    total = 0
+    pending = [value]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, _UNMEASURED):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, (str, bytes, bytearray, int, float)):
+            continue
+        if isinstance(obj, dict):
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            pending.extend(obj)
+        else:
+            if hasattr(obj, "__dict__"):
+                pending.append(obj.__dict__)
+            for cls in type(obj).__mro__:
+                for slot in cls.__dict__.get("__slots__", ()):
+                    if hasattr(obj, slot):
+                        pending.append(getattr(obj, slot))
+    return total
+
+
+class RerunProfiler:
+    """Timings of one script run, by section name, in execution order."""
+
+    def __init__(self, profile=False, trace_memory=False):
+        self.started = time.perf_counter()
+        self.sections = {}
+        self.total = None
+        self.profile_text = None
+        self.memory_peak = None
+        self.session_bytes = None  # key -> bytes, see measure_session()
+        self._nested = []  # seconds spent in child sections, per open section
+        self._profiler = None
+        self._tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start()
+        if profile:
+            self._profiler = cProfile.Profile()
+            try:
+                self._profiler.enable()
+            except ValueError:
+                # Another session's run is already being profiled (one profiler per process on 3.12+).
+                self._profiler = None
+
+    @property
+    def capturing(self):
+        """Whether this run holds cProfile or tracemalloc, which `finish()` releases."""
+        return self.total is None and (self._profiler is not None or self._tracing)
+
+    @contextlib.contextmanager
+    def section(self, name):
+        start = time.perf_counter()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            own = elapsed - self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+            self.sections[name] = self.sections.get(name, 0.0) + own
+
+    def measure_session(self, state):
+        """Records the deep size of every entry of `state` (a session state mapping); returns the total."""
+        seen = set()
+        self.session_bytes = {str(key): deep_size(state[key], seen) for key in list(state.keys())}
+        return sum(self.session_bytes.values())
+
+    def finish(self, top=30):
+        """Stops the run's clocks and capture modes; returns self."""
+        if self.total is not None:
+            return self
+        self.total = time.perf_counter() - self.started
+        if self._profiler is not None:
+            self._profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(top)
+            self.profile_text = out.getvalue()
+        if self._tracing:
+            self.memory_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        return self
+
+    def as_dict(self):
+        run = {"total": self.total, "sections": dict(self.sections)}
+        if self.memory_peak is not None:
+            run["memory_peak_bytes"] = self.memory_peak
+        if self.session_bytes is not None:
+            run["session_bytes"] = sum(self.session_bytes.values())
+        return run
+
+
+class MetricsRegistry:
+    """Process-wide aggregate of finished runs and extra gauges (cache statistics, memory)."""
+
+    def __init__(self, recent=RECENT_RUNS):
+        self.runs = 0
+        self.totals = {}  # section -> [count, sum seconds, max seconds]
+        self.recent = deque(maxlen=recent)
+        self.gauge_sources = {}
+        self.session_sizes = OrderedDict()  # session id -> bytes of its state at its last measured run
+        self._written = 0.0  # time.monotonic() of the last metrics file write
+        self._lock = threading.Lock()
+
+    def record(self, profiler, session_id=None):
+        run = profiler.finish().as_dict()
+        with self._lock:
+            if session_id is not None and "session_bytes" in run:
+                self.session_sizes[session_id] = run["session_bytes"]
+                self.session_sizes.move_to_end(session_id)
+                while len(self.session_sizes) > RECENT_SESSIONS:
+                    self.session_sizes.popitem(last=False)
+            self.runs += 1
+            for name, seconds in list(run["sections"].items()) + [("total", run["total"])]:
+                entry = self.totals.setdefault(name, [0, 0.0, 0.0])
+                entry[0] += 1
+                entry[1] += seconds
+                entry[2] = max(entry[2], seconds)
+            self.recent.append(run)
+
+    def add_gauges(self, name, source):
+        """Registers `source()` -> dict of numbers, sampled on every export (e.g. cache stats)."""
+        self.gauge_sources[name] = source
+
+    def session_memory(self):
+        """Sessions measured and their state sizes in bytes (mean and largest)."""
+        with self._lock:
+            sizes = list(self.session_sizes.values())
+        return {
+            "sessions": len(sizes),
+            "mean_bytes": sum(sizes) / len(sizes) if sizes else 0,
+            "max_bytes": max(sizes, default=0),
+        }
+
+    def gauges(self):
+        values = {f"session_state_{key}": value for key, value in self.session_memory().items()}
+        for name, source in list(self.gauge_sources.items()):
+            for key, value in source().items():
+                if isinstance(value, (int, float)):
+                    values[f"{name}_{key}"] = value
+        return values
+
+    def snapshot(self):
+        with self._lock:
+            sections = {
+                name: {"count": count, "sum_seconds": total, "max_seconds": peak, "mean_seconds": total / count}
+                for name, (count, total, peak) in self.totals.items()
+            }
+            recent = list(self.recent)
+            runs = self.runs
+        return {"runs": runs, "sections": sections, "recent": recent, "gauges": self.gauges()}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix="chess_dashboard"):
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_reruns_total Script runs recorded by this process.",
+            f"# TYPE {prefix}_reruns_total counter",
+            f"{prefix}_reruns_total {snapshot['runs']}",
+            f"# HELP {prefix}_section_seconds Time spent per dashboard section.",
+            f"# TYPE {prefix}_section_seconds summary",
+        ]
+        for name, entry in sorted(snapshot["sections"].items()):
+            lines.append(f'{prefix}_section_seconds_sum{{section="{name}"}} {entry["sum_seconds"]:.6f}')
+            lines.append(f'{prefix}_section_seconds_count{{section="{name}"}} {entry["count"]}')
+        lines.append(f"# HELP {prefix}_section_seconds_max Slowest run per dashboard section.")
+        lines.append(f"# TYPE {prefix}_section_seconds_max gauge")
+        for name, entry in sorted(snapshot["sections"].items()):
+            lines.append(f'{prefix}_section_seconds_max{{section="{name}"}} {entry["max_seconds"]:.6f}')
+        for name, value in sorted(snapshot["gauges"].items()):
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path, min_interval=0):
+        """Writes the metrics for a node_exporter textfile collector (atomically).
+
+        Skipped, returning False, if the file was written less than
+        `min_interval` seconds ago.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._written and now - self._written < min_interval:
+                return False
+            self._written = now
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            handle.write(self.to_prometheus())
+        os.replace(temporary, path)
+        return True
@@ -0,0 +1,193 @@
+"""
+Background jobs for work that should not block a Streamlit script run.
+
+A `JobManager` owns a small thread pool; the dashboard keeps one per server
+process in `st.cache_resource`. Work is submitted as a function taking the
+`Job` as its first argument. The function reports progress through
+`job.update()`, which also raises `JobCancelled` once the job has been
+cancelled, and may publish a partial result in `job.result` (guarded by
+`job.lock`) before it finishes, so readers can use the first results early.
+Finished jobs are dropped by `forget()` once their session has seen them, and
+otherwise after `FINISHED_TTL` seconds, so jobs of closed tabs (and the results
+they hold) do not accumulate.
+
+Heavy CPU work inside a job still goes to the process pool of
+`openings/parallel.py`; the job thread only merges and publishes its results.
+"""
+import concurrent.futures
+import itertools
+import threading
+import time
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+FINISHED_TTL = 600  # seconds a finished job is kept for the session that started it
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's function when the job has been cancelled."""
+
+
+class Job:
+    """State of one background job, shared between its worker thread and the sessions polling it."""
+
+    def __init__(self, job_id, name):
+        self.id = job_id
+        self.name = name
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.finished = None
+        self.lock = threading.Lock()  # guards `result` while the job updates it in place
+        self._cancel = threading.Event()
+        self._future = None
+        self._callbacks = []
+        self._callbacks_lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.status in FINISHED
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        """Asks the job to stop; a queued job never starts, a running one stops at its next `update()`."""
+        self._cancel.set()
+        if self._future is not None and self._future.cancel():
+            self._finish(CANCELLED)
+
+    def update(self, progress=None, message=None):
+        """Reports progress (0..1) from inside the job; raises `JobCancelled` if the job was cancelled."""
+        if progress is not None:
+            self.progress = progress
+        if message is not None:
+            self.message = message
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def add_done_callback(self, callback):
+        """Calls `callback(job)` once the job has finished (at once if it already has), even if it never started."""
+        with self._callbacks_lock:
+            if not self.done:
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def wait(self, timeout=None):
+        """Blocks until the job has finished (for scripts and tests); returns the result."""
+        if self._future is not None:
+            concurrent.futures.wait([self._future], timeout)
+        return self.result
+
+    def _run(self, func, args, kwargs):
+        if self._cancel.is_set():
+            self._finish(CANCELLED)
+            return
+        self.status = RUNNING
+        try:
+            result = func(self, *args, **kwargs)
+        except JobCancelled:
+            self._finish(CANCELLED)
+        except Exception as e:  # reported to the sessions polling the job
+            self.error = e
+            self._finish(FAILED)
+        else:
+            with self.lock:
+                self.result = result
+            self.progress = 1.0
+            self._finish(DONE)
+
+    def _finish(self, status):
+        with self._callbacks_lock:
+            self.finished = time.time()
+            self.status = status
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+
+class JobManager:
+    """Thread pool running `Job`s, with lookup by id and at most one live job per key."""
+
+    def __init__(self, max_workers=2, finished_ttl=FINISHED_TTL):
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="openings-job")
+        self.finished_ttl = finished_ttl
+        self.jobs = {}
+        self._by_key = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, name, func, *args, key=None, **kwargs):
+        """Runs `func(job, *args, **kwargs)` in the background and returns its `Job`.
+
+        With a `key`, a job still queued or running under the same key is
+        returned instead of starting a second one (e.g. one catalogue build
+        for all sessions).
+        """
+        with self._lock:
+            self._evict()
+            if key is not None:
+                existing = self._by_key.get(key)
+                if existing is not None and not existing.done:
+                    return existing
+            job = Job(next(self._ids), name)
+            self.jobs[job.id] = job
+            if key is not None:
+                self._by_key[key] = job
+            job._future = self.executor.submit(job._run, func, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def forget(self, job_id):
+        """Drops a finished job (and its result) from the manager."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is not None and job.done:
+                self._drop(job)
+
+    def _drop(self, job):
+        del self.jobs[job.id]
+        for key in [key for key, keyed in self._by_key.items() if keyed is job]:
+            del self._by_key[key]
+
+    def _evict(self):
+        """Drops jobs finished more than `finished_ttl` seconds ago (their sessions may be gone). Holds `_lock`."""
+        expired = time.time() - self.finished_ttl
+        for job in [job for job in self.jobs.values() if job.done and job.finished < expired]:
+            self._drop(job)
+
+    def active(self):
+        return [job for job in list(self.jobs.values()) if not job.done]
+
+    def stats(self):
+        with self._lock:
+            self._evict()
+            jobs = list(self.jobs.values())
+        return {
+            "jobs": len(jobs),
+            "active": sum(not job.done for job in jobs),
+            "failed": sum(job.status == FAILED for job in jobs),
+            "cancelled": sum(job.status == CANCELLED for job in jobs),
+        }
+
+    def shutdown(self):
+        for job in self.active():
+            job.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,117 @@
+"""
+Process-pool backend for analysing large PGN uploads.
+
+The file is split at byte offsets into chunks that each start on a game
+boundary (a tag-pair line after a blank line). Worker processes replay and
+classify their chunks independently with `openings.ingest.ingest_pgn`, and the
+partial `IngestReport`s are merged back in the parent. Each worker opens the
+compiled catalogue (`openings/catalogue.py`) once, in the pool initializer, and
+builds its classifier from the catalogue's packed moves and keys instead of
+replaying every line's SAN; tasks only carry offsets.
+"""
+import concurrent.futures
+import io
+import multiprocessing
+import os
+import re
+
+from .catalogue import open_catalogue
+from .classifier import OpeningClassifier
+from .ingest import IngestReport, ingest_pgn
+
+# A new game starts with a tag pair at the beginning of a line that follows a blank line.
+GAME_START_RE = re.compile(rb"\r?\n[ \t]*\r?\n(?=\[)")
+MIN_CHUNK_BYTES = 1 << 20  # smaller chunks cost more in scheduling than they save
+CHUNKS_PER_WORKER = 4  # oversplit so one slow chunk does not hold back the pool
+PARALLEL_THRESHOLD_BYTES = 4 << 20  # below this, the serial path is faster
+
+_worker_classifier = None
+_worker_catalogue = None
+
+
+def split_pgn(path, chunks):
+    """Returns up to `chunks` (start, end) byte ranges of `path`, each aligned to a game start."""
+    size = os.path.getsize(path)
+    chunks = max(1, min(chunks, size // MIN_CHUNK_BYTES))
+    offsets = [0]
+    with open(path, "rb") as handle:
+        for i in range(1, chunks):
+            target = max(size * i // chunks, offsets[-1])
+            handle.seek(target)
+            window = handle.read(64 * 1024)
+            while window:
+                match = GAME_START_RE.search(window)
+                if match:
+                    offsets.append(target + match.end())
+                    break
+                # Keep a small overlap so a separator split across two reads is still found.
+                target += max(len(window) - 8, 1)
+                handle.seek(target)
+                window = handle.read(64 * 1024)
+    offsets.append(size)
+    return [(start, end) for start, end in zip(offsets, offsets[1:]) if end > start]
+
+
+def _init_worker(csv_path):
+    global _worker_classifier, _worker_catalogue
+    catalogue = open_catalogue(csv_path)
+    _worker_catalogue = catalogue.frame()
+    _worker_classifier = OpeningClassifier(catalogue.opening_index())
+
+
+def _analyse_chunk(path, start, end, explorer_plies):
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        chunk = io.BytesIO(handle.read(end - start))
+    return ingest_pgn(chunk, _worker_classifier, _worker_catalogue, explorer_plies=explorer_plies)
+
+
+class ParallelPgnAnalyser:
+    """Process pool whose workers hold a classifier for the catalogue compiled from `csv_path`.
+
+    Workers are spawned rather than forked: the parent is a multi-threaded
+    Streamlit server, and forking threads is unsafe. The pool is meant to be
+    created once per process and reused for every upload.
+    """
+
+    def __init__(self, csv_path, max_workers=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(csv_path,),
+        )
+
+    def analyse(self, path, on_progress=None, explorer_plies=0, report=None, lock=None):
+        """Classifies every game of the PGN file at `path`.
+
+        `on_progress(games, fraction)` is called as chunks complete, with the
+        fraction of bytes analysed so far; if it raises, the chunks not yet
+        started are cancelled. `explorer_plies` is passed on to `ingest_pgn`.
+        Chunk reports are merged into `report` (a new one by default) as they
+        arrive, while holding `lock` if one is given.
+        """
+        total_bytes = os.path.getsize(path) or 1
+        ranges = split_pgn(path, self.max_workers * CHUNKS_PER_WORKER)
+        futures = {self.executor.submit(_analyse_chunk, path, start, end, explorer_plies): end - start for start, end in ranges}
+        report = IngestReport() if report is None else report
+        done_bytes = 0
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                chunk_report = future.result()
+                if lock is not None:
+                    with lock:
+                        report.merge(chunk_report)
+                else:
+                    report.merge(chunk_report)
+                done_bytes += futures[future]
+                if on_progress:
+                    on_progress(report.games, done_bytes / total_bytes)
+        finally:
+            for future in futures:
+                future.cancel()
+        return report
+
+    def shutdown(self):
+        self.executor.shutdown(cancel_futures=True)
@@ -0,0 +1,54 @@
+"""
+Cached `chess.svg.board` renders.
+
+Streamlit reruns the whole script on every widget interaction, so the same
+board SVG would otherwise be regenerated on each click by every session. Renders
+are keyed by (FEN, orientation, last move, size), which fully determines the
+output, and kept in the "svg" namespace of an `ArtefactCache` (see
+`openings/cache.py`) shared by all sessions of the server process.
+"""
+import chess
+
+from .cache import ArtefactCache
+
+NAMESPACE = "svg"
+
+
+class SvgRenderCache:
+    """Board SVGs rendered once per position and stored in a shared `ArtefactCache`."""
+
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else ArtefactCache()
+
+    def __len__(self):
+        return self.stats()["entries"]
+
+    def render(self, board, orientation=chess.WHITE, lastmove=None, size=None):
+        """SVG for `board` (a `chess.Board` or a FEN string)."""
+        fen = board if isinstance(board, str) else board.fen()
+        key = (fen, orientation, lastmove.uci() if lastmove else None, size)
+        svg = self.cache.get(NAMESPACE, key)
+        if svg is not None:
+            return svg
+        # Rendered outside the cache's lock, so sessions drawing different positions do not serialise.
+        import chess.svg
+        if isinstance(board, str):
+            board = chess.Board(board)
+        return self.cache.put(NAMESPACE, key, chess.svg.board(board=board, orientation=orientation, lastmove=lastmove, size=size))
+
+    def prewarm(self, index, orientation=chess.WHITE, size=None):
+        """Renders every ply of every compiled opening line, until the cache is nearly full."""
+        rendered = 0
+        for line in index.lines:
+            for ply, fen in enumerate(line.fens):
+                if self.cache.full:
+                    return rendered
+                self.render(fen, orientation, line.last_move_at(ply), size)
+                rendered += 1
+        return rendered
+
+    def stats(self):
+        return self.cache.stats(NAMESPACE)
+
+    def clear(self):
+        self.cache.clear(NAMESPACE)
@@ -0,0 +1,170 @@
+"""
+Indexed search over the openings catalogue.
+
+Built once per catalogue, right after `load_data()`:
+
+* a character n-gram inverted index (n = 1..3) over normalised names, so a
+  substring query only verifies the rows that contain all of its n-grams;
+* trigram similarity ranking for fuzzy matches when nothing contains the query;
+* a categorical ECO index that also answers family prefixes such as "B" or "C4";
+* a name -> rows dictionary for exact lookups;
+* move-sequence search through the opening tree, so "1. Nf3 d5 2. d4" finds the
+  lines that reach the same position by another move order.
+
+Every query returns catalogue row positions as a NumPy array (in catalogue
+order, except fuzzy results, which are ranked), and the dashboard turns the
+combined result into a view with a single `iloc`.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+
+import chess
+import numpy as np
+
+from .index import SAN_ERRORS, position_key, tokenize_moves
+
+MAX_GRAM = 3
+FUZZY_MIN_SIMILARITY = 0.5
+FUZZY_LIMIT = 20
+NON_ALNUM_RE = re.compile(r"[^0-9a-z]+")
+EMPTY = np.empty(0, dtype=np.int64)
+
+
+def normalise(text):
+    """Lowercase, strip accents and collapse punctuation to single spaces ("Réti's" -> "reti s")."""
+    if not isinstance(text, str):
+        return ""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return NON_ALNUM_RE.sub(" ", text.lower()).strip()
+
+
+def ngrams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class OpeningSearch:
+    """Inverted indexes over the catalogue's names, ECO codes and move sequences."""
+
+    def __init__(self, df, index=None):
+        self.index = index
+        self.size = len(df)
+        self.names = [normalise(name) for name in df["Name"].tolist()] if "Name" in df.columns else []
+        self.all_rows = np.arange(self.size, dtype=np.int64)
+
+        postings = defaultdict(list)
+        self.rows_by_name = {}
+        for row, name in enumerate(self.names):
+            for n in range(1, MAX_GRAM + 1):
+                for gram in ngrams(name, n):
+                    postings[gram].append(row)
+        if "Name" in df.columns:
+            for row, name in enumerate(df["Name"].tolist()):
+                self.rows_by_name.setdefault(name, []).append(row)
+        self.postings = {gram: np.asarray(rows, dtype=np.int64) for gram, rows in postings.items()}
+        self.trigram_counts = np.array([len(ngrams(name, MAX_GRAM)) for name in self.names], dtype=np.int64)
+
+        self.rows_by_eco = {}
+        if "ECO" in df.columns:
+            eco = df["ECO"].astype("category")
+            codes = eco.cat.codes.to_numpy()
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(eco.cat.categories) + 1))
+            for i, code in enumerate(eco.cat.categories):
+                self.rows_by_eco[code] = order[bounds[i]:bounds[i + 1]].astype(np.int64)
+        self.eco_codes = sorted(self.rows_by_eco)
+
+    def by_eco(self, eco):
+        """Rows with ECO code `eco`, or whose code starts with it when it is a family prefix."""
+        if eco in self.rows_by_eco:
+            return self.rows_by_eco[eco]
+        matches = [self.rows_by_eco[code] for code in self.eco_codes if code.startswith(eco)]
+        return np.sort(np.concatenate(matches)) if matches else EMPTY
+
+    def contains(self, query):
+        """Rows whose normalised name contains the normalised query (case and accent insensitive)."""
+        query = normalise(query)
+        if not query:
+            return self.all_rows
+        if len(query) <= MAX_GRAM:
+            return self.postings.get(query, EMPTY)
+        lists = []
+        for gram in ngrams(query, MAX_GRAM):
+            rows = self.postings.get(gram)
+            if rows is None:
+                return EMPTY
+            lists.append(rows)
+        lists.sort(key=len)
+        candidates = lists[0]
+        for rows in lists[1:]:
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+            if not len(candidates):
+                return EMPTY
+        # Every trigram occurs somewhere in the name; confirm they occur contiguously.
+        return np.asarray([row for row in candidates if query in self.names[row]], dtype=np.int64)
+
+    def fuzzy(self, query, limit=FUZZY_LIMIT, min_similarity=FUZZY_MIN_SIMILARITY):
+        """Rows ranked by the share of the query's trigrams found in their name, best first.
+
+        Ties are broken by Jaccard similarity, so shorter names with the same
+        overlap rank higher.
+        """
+        grams = ngrams(normalise(query), MAX_GRAM)
+        lists = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not lists:
+            return EMPTY
+        shared = np.bincount(np.concatenate(lists), minlength=self.size)
+        coverage = shared / len(grams)
+        jaccard = shared / np.maximum(len(grams) + self.trigram_counts - shared, 1)
+        ranked = np.lexsort((-jaccard, -coverage))[:limit]
+        return ranked[coverage[ranked] >= min_similarity].astype(np.int64)
+
+    def by_name(self, query, fuzzy=True):
+        """Substring matches in catalogue order; falls back to fuzzy ranking when there are none.
+
+        Returns `(rows, is_fuzzy)`.
+        """
+        rows = self.contains(query)
+        if len(rows) or not fuzzy:
+            return rows, False
+        return self.fuzzy(query), True
+
+    def by_moves(self, moves_str):
+        """Rows whose line passes through the position reached by `moves_str`, in any move order.
+
+        Returns None if the moves cannot be played from the initial position.
+        """
+        if self.index is None:
+            return EMPTY
+        board = chess.Board()
+        try:
+            for token in tokenize_moves(moves_str):
+                board.push_san(token)
+        except SAN_ERRORS:
+            return None
+        node = self.index.node(position_key(board))
+        return np.unique(np.asarray(node.lines, dtype=np.int64)) if node else EMPTY
+
+    def search(self, eco=None, name_query="", moves_query=""):
+        """Combines the filters; returns `(rows, is_fuzzy)` or `(None, False)` for unplayable moves."""
+        rows, is_fuzzy = self.all_rows, False
+        if eco:
+            rows = self.by_eco(eco)
+        if name_query:
+            name_rows, is_fuzzy = self.by_name(name_query)
+            rows = name_rows if rows is self.all_rows else narrow(rows, name_rows)
+        if moves_query:
+            move_rows = self.by_moves(moves_query)
+            if move_rows is None:
+                return None, False
+            rows = move_rows if rows is self.all_rows else narrow(move_rows, rows)
+        return rows, is_fuzzy
+
+    def rows_named(self, name):
+        """Rows with exactly this display name (names are not unique)."""
+        return self.rows_by_name.get(name, [])
+
+
+def narrow(allowed, rows):
+    """The entries of `rows` that are also in `allowed`, keeping the order of `rows`."""
+    return rows[np.isin(rows, allowed, assume_unique=True)]
@@ -0,0 +1,127 @@
+"""
+Precomputed aggregate statistics for the dashboard's sidebar.
+
+Everything the sidebar shows is derived from a few per-row codes computed once
+per catalogue: the ECO code, the ECO family (A-E), the line's depth in plies
+and a bit per name theme ("Gambit", "Attack", ...). The whole catalogue's
+tables are built at load time; a filtered view is a `np.bincount` over the
+codes of its rows, memoised per filter state in a small LRU, so no rerun scans
+the names or groups the DataFrame.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from .search import normalise
+
+FAMILIES = ("A", "B", "C", "D", "E")
+OTHER_FAMILY = "?"
+# Theme name -> word prefix looked for in the normalised opening name
+THEMES = {
+    "Gambit": "gambit",
+    "Attack": "attack",
+    "Defense": "defen",
+    "Counter": "counter",
+    "System": "system",
+}
+DEPTH_BIN = 2  # plies per depth histogram bar
+DEFAULT_MAX_VIEWS = 256
+
+
+@dataclass
+class StatsSummary:
+    """Sidebar tables for one set of catalogue rows (all of them, or a filtered view)."""
+
+    total: int
+    eco_counts: object  # pandas Series: ECO code -> openings, codes with no opening left out
+    family_counts: object  # pandas Series: "A".."E" (and "?") -> openings
+    theme_counts: object  # pandas Series: theme -> openings whose name mentions it
+    depth_histogram: object  # pandas Series: "0-1", "2-3", ... plies -> openings
+
+
+class OpeningStats:
+    """Per-row codes of the catalogue and the summaries derived from them."""
+
+    def __init__(self, df, index=None, max_views=DEFAULT_MAX_VIEWS):
+        import pandas as pd
+
+        self.size = len(df)
+        eco = df["ECO"].astype("category") if "ECO" in df.columns else pd.Series([], dtype="category")
+        self.eco_codes = list(eco.cat.categories)
+        self.eco_of_row = eco.cat.codes.to_numpy().astype(np.int32)
+        self.family_labels = FAMILIES + (OTHER_FAMILY,)
+        family_of_code = np.array(
+            [FAMILIES.index(code[:1]) if code[:1] in FAMILIES else len(FAMILIES) for code in map(str, self.eco_codes)],
+            dtype=np.int32)
+        self.family_of_row = family_of_code[self.eco_of_row] if self.size else np.empty(0, dtype=np.int32)
+
+        names = [normalise(name) for name in df["Name"].tolist()] if "Name" in df.columns else [""] * self.size
+        self.theme_labels = list(THEMES)
+        self.themes_of_row = np.zeros((self.size, len(THEMES)), dtype=bool)
+        for column, keyword in enumerate(THEMES.values()):
+            self.themes_of_row[:, column] = [keyword in name for name in names]
+
+        if index is not None:
+            self.depth_of_row = np.array([len(index.line(row)) for row in range(self.size)], dtype=np.int32)
+        else:
+            self.depth_of_row = np.zeros(self.size, dtype=np.int32)
+        self.depth_bins = int(self.depth_of_row.max()) // DEPTH_BIN + 1 if self.size else 1
+
+        self.overall = self._summarise(np.arange(self.size))
+        self.max_views = max_views
+        self.hits = 0
+        self.misses = 0
+        self._views = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _summarise(self, rows):
+        import pandas as pd
+
+        eco = np.bincount(self.eco_of_row[rows], minlength=len(self.eco_codes))
+        family = np.bincount(self.family_of_row[rows], minlength=len(self.family_labels))
+        depth = np.bincount(self.depth_of_row[rows] // DEPTH_BIN, minlength=self.depth_bins)
+        depth_labels = [f"{b * DEPTH_BIN:02d}-{b * DEPTH_BIN + DEPTH_BIN - 1:02d}" for b in range(self.depth_bins)]
+        eco_counts = pd.Series(eco, index=self.eco_codes, name="Openings")
+        family_counts = pd.Series(family, index=self.family_labels, name="Openings")
+        if not family_counts[OTHER_FAMILY]:
+            family_counts = family_counts.drop(OTHER_FAMILY)
+        return StatsSummary(
+            total=len(rows),
+            eco_counts=eco_counts[eco_counts > 0],
+            family_counts=family_counts,
+            theme_counts=pd.Series(self.themes_of_row[rows].sum(axis=0), index=self.theme_labels, name="Openings"),
+            depth_histogram=pd.Series(depth, index=depth_labels, name="Openings"),
+        )
+
+    def summary(self, rows=None, key=None):
+        """Summary of `rows` (None = the whole catalogue), memoised under `key` (e.g. the filter state)."""
+        if rows is None or len(rows) == self.size:
+            return self.overall
+        if key is None:
+            return self._summarise(np.asarray(rows))
+        with self._lock:
+            summary = self._views.get(key)
+            if summary is not None:
+                self._views.move_to_end(key)
+                self.hits += 1
+                return summary
+            self.misses += 1
+        summary = self._summarise(np.asarray(rows))
+        with self._lock:
+            self._views[key] = summary
+            while len(self._views) > self.max_views:
+                self._views.popitem(last=False)
+        return summary
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._views),
+                "maxsize": self.max_views,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
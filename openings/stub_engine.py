@@ -0,0 +1,76 @@
+"""
+A minimal UCI engine for trying out and testing the evaluation feature without
+Stockfish: `python -m openings.stub_engine`.
+
+It answers `go` with a one-ply material search, so its scores are cheap,
+deterministic and only roughly chess-like.
+"""
+import sys
+
+import chess
+
+PIECE_VALUES = {chess.PAWN: 100, chess.KNIGHT: 300, chess.BISHOP: 310, chess.ROOK: 500, chess.QUEEN: 900, chess.KING: 0}
+
+
+def material(board):
+    """Material balance in centipawns from the side to move's point of view."""
+    score = sum(PIECE_VALUES[piece.piece_type] * (1 if piece.color == chess.WHITE else -1)
+                for piece in board.piece_map().values())
+    return score if board.turn == chess.WHITE else -score
+
+
+def best_move(board):
+    """(move, score): the move leaving the best material balance, ties broken by UCI order."""
+    best = None
+    for move in sorted(board.legal_moves, key=lambda move: move.uci()):
+        board.push(move)
+        score = 100_000 if board.is_checkmate() else -material(board)
+        board.pop()
+        if best is None or score > best[1]:
+            best = (move, score)
+    return best
+
+
+def set_position(tokens):
+    if tokens[:1] == ["startpos"]:
+        board, rest = chess.Board(), tokens[1:]
+    else:
+        fen_end = tokens.index("moves") if "moves" in tokens else len(tokens)
+        board, rest = chess.Board(" ".join(tokens[1:fen_end])), tokens[fen_end:]
+    for uci in rest[1:] if rest[:1] == ["moves"] else []:
+        board.push_uci(uci)
+    return board
+
+
+def main():
+    board = chess.Board()
+    for line in sys.stdin:
+        command, *tokens = line.split() or [""]
+        if command == "uci":
+            print("id name openings-stub")
+            print("id author Chess Openings Dashboard")
+            print("uciok")
+        elif command == "isready":
+            print("readyok")
+        elif command == "ucinewgame":
+            board = chess.Board()
+        elif command == "position":
+            board = set_position(tokens)
+        elif command == "go":
+            depth = int(tokens[tokens.index("depth") + 1]) if "depth" in tokens else 1
+            found = best_move(board)
+            if found is None:
+                print(f"info depth {depth} score {'mate 0' if board.is_check() else 'cp 0'}")
+                print("bestmove 0000")
+            else:
+                move, score = found
+                score_text = "mate 1" if score == 100_000 else f"cp {score}"
+                print(f"info depth {depth} score {score_text} pv {move.uci()}")
+                print(f"bestmove {move.uci()}")
+        elif command == "quit":
+            break
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
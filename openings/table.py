@@ -0,0 +1,54 @@
+"""
+Server-side sorting and paging of catalogue views.
+
+The dashboard only ever sends one page of the openings table to the browser.
+A view is an array of catalogue row positions (see `openings/search.py`);
+sorting it compares precomputed per-column ranks instead of strings, and a
+page is a slice of the sorted rows. Row positions double as stable opening
+IDs: unlike names, they are unique within a catalogue.
+"""
+import threading
+
+import numpy as np
+
+SORTABLE_COLUMNS = ("ECO", "Name", "Moves")
+PAGE_SIZES = (25, 50, 100, 250)
+DEFAULT_PAGE_SIZE = 50
+
+
+class OpeningTable:
+    """Sort ranks per column of the catalogue, computed on first use."""
+
+    def __init__(self, df):
+        self.df = df
+        self._ranks = {}
+        self._lock = threading.Lock()
+
+    def rank(self, column):
+        """rank[row] = position of `row` when the catalogue is sorted by `column` (case-insensitive, stable)."""
+        with self._lock:
+            ranks = self._ranks.get(column)
+            if ranks is None:
+                values = self.df[column].fillna("").astype(str).str.casefold().to_numpy()
+                ranks = np.empty(len(values), dtype=np.int64)
+                ranks[np.argsort(values, kind="stable")] = np.arange(len(values))
+                self._ranks[column] = ranks
+            return ranks
+
+    def sort(self, rows, column=None, descending=False):
+        """`rows` ordered by `column`; None keeps the view's own order (catalogue order, or fuzzy rank)."""
+        if column is None:
+            return rows[::-1] if descending else rows
+        order = np.argsort(self.rank(column)[rows], kind="stable")
+        return rows[order[::-1] if descending else order]
+
+
+def page_count(total, page_size):
+    return max(1, -(-total // page_size))
+
+
+def paginate(rows, number, page_size):
+    """Rows on 1-based page `number` (clamped to the available pages)."""
+    number = min(max(number, 1), page_count(len(rows), page_size))
+    start = (number - 1) * page_size
+    return rows[start:start + page_size]
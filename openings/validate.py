@@ -0,0 +1,219 @@
+"""
+Offline validation and normalisation of an openings catalogue.
+
+`validate_catalogue` plays every `Moves` string and reports problems by row
+(the catalogue row ID also shown in the dashboard's table):
+
+* errors: tokens that are not SAN, illegal or ambiguous moves, rows without
+  moves;
+* warnings: move numbers that do not match their ply, moves written in a
+  non-canonical form ("0-0", "Nf3+" for a quiet move), rows repeating an
+  earlier row's line ("duplicate" when ECO and name repeat too,
+  "duplicate_line" otherwise);
+* info: transpositions, i.e. lines that reach an earlier line's final position
+  by another move order.
+
+Lines are sorted by their tokens and played depth-first: between two
+consecutive lines the board is popped back to their common prefix, so shared
+prefixes are played once. Large catalogues are split into contiguous slices of
+the sorted lines and played in a process pool. Duplicates and transpositions
+are then found from the lines' UCI strings and final Zobrist keys.
+`CatalogueValidation.cleaned()` gives the catalogue without the rows that have
+errors or exactly duplicate an earlier row, with `Moves` rewritten in
+canonical SAN and SAN/UCI/FEN columns added.
+"""
+import concurrent.futures
+import multiprocessing
+import os
+import re
+from dataclasses import dataclass, field
+
+import chess
+
+from .index import MOVE_NUMBER_RE, RESULT_TOKENS, position_key, tokenize_moves
+
+ERROR = "error"
+WARNING = "warning"
+INFO = "info"
+SEVERITIES = (ERROR, WARNING, INFO)
+PARALLEL_ROWS = 20_000  # below this, starting worker processes costs more than it saves
+CHUNKS_PER_WORKER = 4
+MOVE_NUMBER_VALUE_RE = re.compile(r"^(\d+)(\.+)")
+SAN_ERROR_KINDS = ((chess.AmbiguousMoveError, "ambiguous"), (chess.IllegalMoveError, "illegal"),
+                   (chess.InvalidMoveError, "invalid"))
+
+
+@dataclass
+class Issue:
+    row: int
+    severity: str
+    kind: str
+    detail: str
+
+
+@dataclass
+class CheckedLine:
+    """One catalogue row after playing its moves (up to the first bad token)."""
+    row: int
+    sans: list
+    ucis: list
+    fen: str
+    key: int
+    issues: list = field(default_factory=list)
+
+    @property
+    def valid(self):
+        return not any(issue.severity == ERROR for issue in self.issues)
+
+
+def numbered_moves(sans):
+    """Canonical `Moves` text for a line from the initial position: "1. e4 e5 2. Nf3"."""
+    return " ".join(f"{ply // 2 + 1}. {san}" if ply % 2 == 0 else san for ply, san in enumerate(sans))
+
+
+def check_numbering(row, moves_str):
+    """Warnings for move numbers that do not match the ply they precede."""
+    issues = []
+    ply = 0
+    for raw in moves_str.split() if isinstance(moves_str, str) else []:
+        match = MOVE_NUMBER_VALUE_RE.match(raw)
+        if match:
+            number, black = int(match.group(1)), len(match.group(2)) >= 3
+            if (number, black) != (ply // 2 + 1, ply % 2 == 1):
+                expected = f"{ply // 2 + 1}{'...' if ply % 2 else '.'}"
+                issues.append(Issue(row, WARNING, "numbering", f"'{match.group(0)}' before ply {ply + 1}, expected '{expected}'"))
+        token = MOVE_NUMBER_RE.sub("", raw)
+        if token and token not in RESULT_TOKENS:
+            ply += 1
+    return issues
+
+
+def check_sorted_lines(entries):
+    """Plays `entries`, a list of (row, tokens) sorted by tokens; returns a `CheckedLine` per entry.
+
+    Runs in worker processes, so it only takes and returns picklable values.
+    """
+    board = chess.Board()
+    played, sans, ucis = [], [], []  # tokens on the board's move stack, and their canonical forms
+    checked = []
+    for row, tokens in entries:
+        common = 0
+        while common < min(len(played), len(tokens)) and played[common] == tokens[common]:
+            common += 1
+        while len(played) > common:
+            board.pop()
+            played.pop()
+            sans.pop()
+            ucis.pop()
+        issues = []
+        for token in tokens[common:]:
+            try:
+                move = board.parse_san(token)
+            except ValueError as e:
+                kind = next((kind for error, kind in SAN_ERROR_KINDS if isinstance(e, error)), "invalid")
+                issues.append(Issue(row, ERROR, kind, f"'{token}' at ply {len(sans) + 1}: {e}"))
+                break
+            san = board.san_and_push(move)
+            played.append(token)
+            sans.append(san)
+            ucis.append(move.uci())
+        rewritten = [f"'{token}' -> '{san}'" for token, san in zip(tokens, sans) if token != san]
+        if rewritten:
+            issues.append(Issue(row, WARNING, "notation", ", ".join(rewritten)))
+        if not tokens:
+            issues.append(Issue(row, ERROR, "empty", "no moves"))
+        checked.append(CheckedLine(row, list(sans), list(ucis), board.fen(), position_key(board), issues))
+    return checked
+
+
+@dataclass
+class CatalogueValidation:
+    """Checked lines of a catalogue, by row, and every issue found."""
+    df: object  # the validated DataFrame
+    lines: list  # CheckedLine per row, in row order
+    issues: list
+
+    def count(self, severity):
+        return sum(issue.severity == severity for issue in self.issues)
+
+    @property
+    def errors(self):
+        return self.count(ERROR)
+
+    def issues_frame(self):
+        import pandas as pd
+        order = {severity: rank for rank, severity in enumerate(SEVERITIES)}
+        issues = sorted(self.issues, key=lambda issue: (issue.row, order[issue.severity]))
+        return pd.DataFrame([(i.row, i.severity, i.kind, i.detail) for i in issues],
+                            columns=["Row", "Severity", "Kind", "Detail"])
+
+    def normalised_frame(self):
+        """The catalogue with canonical `Moves` and SAN, UCI and FEN (final position) columns."""
+        frame = self.df.copy()
+        frame["Moves"] = [numbered_moves(line.sans) for line in self.lines]
+        frame["SAN"] = [" ".join(line.sans) for line in self.lines]
+        frame["UCI"] = [" ".join(line.ucis) for line in self.lines]
+        frame["FEN"] = [line.fen for line in self.lines]
+        return frame
+
+    def cleaned(self):
+        """The normalised catalogue without rows that have errors or exactly duplicate an earlier row."""
+        dropped = {issue.row for issue in self.issues if issue.severity == ERROR or issue.kind == "duplicate"}
+        frame = self.normalised_frame()
+        return frame[[row not in dropped for row in range(len(frame))]].reset_index(drop=True)
+
+
+def find_repeats(df, lines):
+    """Issues for lines repeating an earlier line, and for lines transposing into an earlier line's position."""
+    issues = []
+    first_by_row, first_by_line, first_by_position = {}, {}, {}
+    labels = list(df[["ECO", "Name"]].itertuples(index=False, name=None)) if {"ECO", "Name"} <= set(df.columns) else None
+    for line in lines:
+        if not line.valid:
+            continue
+        uci = " ".join(line.ucis)
+        first = first_by_row.setdefault((uci, labels[line.row] if labels else None), line.row)
+        if first != line.row:
+            issues.append(Issue(line.row, WARNING, "duplicate", f"repeats row {first}"))
+            continue
+        first = first_by_line.setdefault(uci, line.row)
+        if first != line.row:
+            issues.append(Issue(line.row, WARNING, "duplicate_line", f"same moves as row {first}"))
+            continue
+        first = first_by_position.setdefault(line.key, line.row)
+        if first != line.row:
+            issues.append(Issue(line.row, INFO, "transposition", f"reaches the final position of row {first} by another move order"))
+    return issues
+
+
+def validate_catalogue(df, workers=None, on_progress=None):
+    """Checks every row of a catalogue DataFrame; returns a `CatalogueValidation`.
+
+    `workers` processes play the lines when there are at least `PARALLEL_ROWS`
+    of them (default: one per core). `on_progress(fraction)` is called as
+    slices complete.
+    """
+    moves = df["Moves"].tolist() if "Moves" in df.columns else [""] * len(df)
+    entries = sorted(((row, tokenize_moves(text)) for row, text in enumerate(moves)), key=lambda entry: entry[1])
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(entries) >= PARALLEL_ROWS:
+        size = -(-len(entries) // (workers * CHUNKS_PER_WORKER))
+        chunks = [entries[start:start + size] for start in range(0, len(entries), size)]
+        checked = []
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            for done, result in enumerate(pool.map(check_sorted_lines, chunks), 1):
+                checked.extend(result)
+                if on_progress:
+                    on_progress(done / len(chunks))
+    else:
+        checked = check_sorted_lines(entries)
+        if on_progress:
+            on_progress(1.0)
+
+    lines = [None] * len(df)
+    for line in checked:
+        lines[line.row] = line
+    issues = [issue for row, text in enumerate(moves) for issue in check_numbering(row, text)]
+    issues.extend(issue for line in lines for issue in line.issues)
+    issues.extend(find_repeats(df, lines))
+    return CatalogueValidation(df, lines, issues)
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+from openings.classifier import OpeningClassifier
+from openings.index import OpeningIndex
+
+CATALOGUE_ROWS = [
+    ("B20", "Sicilian Defense", "1. e4 c5"),
+    ("B27", "Sicilian Defense: Hyperaccelerated Fianchetto", "1. e4 c5 2. Nf3 g6"),
+    ("C20", "King's Pawn Game", "1. e4 e5"),
+    ("D00", "Queen's Pawn Game", "1. d4 d5"),
+    ("D02", "Queen's Pawn Game: Zukertort Variation", "1. d4 d5 2. Nf3"),
+    ("A06", "Zukertort Opening: Queen's Pawn", "1. Nf3 d5"),
+]
+
+GAMES = [
+    ('[Event "One"]\n[Result "1-0"]\n\n1. e4 c5 2. Nf3 d6 3. d4 1-0\n'),
+    ('[Event "Two"]\n[Result "0-1"]\n\n1. e4 c5 2. Nf3 g6 0-1\n'),
+    ('[Event "Three"]\n[Result "1/2-1/2"]\n\n1. Nf3 d5 2. d4 Nf6 1/2-1/2\n'),
+]
+
+
+@pytest.fixture
+def catalogue_df():
+    return pd.DataFrame(
+        [{"ECO": eco, "Name": name, "Moves": moves, "Description": ""} for eco, name, moves in CATALOGUE_ROWS],
+        columns=["ECO", "Name", "Moves", "Description"])
+
+
+@pytest.fixture
+def index(catalogue_df):
+    return OpeningIndex.from_dataframe(catalogue_df)
+
+
+@pytest.fixture
+def classifier(index):
+    return OpeningClassifier(index)
+
+
+@pytest.fixture
+def pgn_bytes():
+    return "\n".join(GAMES).encode("utf-8")
@@ -0,0 +1,47 @@
+import pytest
+
+from openings.catalogue import (Catalogue, build_catalogue, catalogue_is_current, catalogue_path_for,
+                                file_sha256, open_catalogue, read_meta)
+from openings.index import OpeningIndex
+
+
+@pytest.fixture
+def csv_path(tmp_path, catalogue_df):
+    path = tmp_path / "openings.csv"
+    catalogue_df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_round_trip_matches_the_csv(csv_path, catalogue_df):
+    assert not catalogue_is_current(csv_path)
+    catalogue = open_catalogue(csv_path)
+    assert catalogue_is_current(csv_path)
+    assert len(catalogue) == len(catalogue_df)
+    assert catalogue.frame().fillna("").equals(catalogue_df.fillna(""))
+    expected = OpeningIndex.from_dataframe(catalogue_df)
+    loaded = catalogue.opening_index()
+    assert [(line.sans, line.ucis, line.fens, line.keys) for line in loaded.lines] == \
+        [(line.sans, line.ucis, line.fens, line.keys) for line in expected.lines]
+    assert loaded.nodes.keys() == expected.nodes.keys()
+    meta = read_meta(catalogue_path_for(csv_path))
+    assert meta["source_sha256"] == file_sha256(csv_path) and meta["rows"] == len(catalogue_df)
+
+
+def test_a_changed_csv_is_recompiled(csv_path, catalogue_df):
+    build_catalogue(csv_path)
+    old_sha = Catalogue.load(catalogue_path_for(csv_path)).meta["source_sha256"]
+    changed = catalogue_df.copy()
+    changed.loc[len(changed)] = ["A00", "Polish Opening", "1. b4", ""]
+    changed.to_csv(csv_path, index=False)
+    assert not catalogue_is_current(csv_path)
+    catalogue = open_catalogue(csv_path)
+    assert catalogue.meta["source_sha256"] == file_sha256(csv_path) != old_sha
+    assert len(catalogue) == len(changed)
+    assert catalogue.frame()["Moves"].iloc[-1] == "1. b4"
+    assert catalogue_is_current(csv_path)
+
+
+def test_load_of_a_missing_catalogue_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        Catalogue.load(str(tmp_path / "missing.catalogue"))
+    assert read_meta(str(tmp_path / "missing.catalogue")) is None
@@ -0,0 +1,105 @@
+import random
+
+import chess
+import pytest
+
+from openings.cache import SqliteBackend
+from openings.engine import STUB_COMMAND as STUB, EnginePool
+from openings.index import position_key
+
+MATED = "rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3"  # fool's mate, White to move
+STALEMATE = "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1"
+
+
+def random_boards(count, seed=0):
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(count):
+        board = chess.Board()
+        for _ in range(rng.randrange(0, 30)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        boards.append(board)
+    return boards
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = EnginePool(STUB, workers=2, depth=1, cache=SqliteBackend(str(tmp_path / "evaluations.sqlite")))
+    yield pool
+    pool.close()
+
+
+def test_evaluate_many_positions(pool):
+    # Regression: at depth 1 analyses often finish before submit registers its callback
+    boards = random_boards(500)
+    for board in boards:
+        assert pool.evaluate(board, timeout=10) is not None
+    again = pool.evaluate(boards[0], timeout=10)
+    assert again == pool.cached(boards[0])
+    assert pool.analysed == len({position_key(board) for board in boards})
+
+
+def test_evaluate_many_counts_new_positions(pool):
+    boards = random_boards(100, seed=1)
+    boards += boards[:10]
+    distinct = len({position_key(board) for board in boards})
+    assert pool.evaluate_many(boards) == distinct
+    assert pool.evaluate_many(boards) == 0
+
+
+def test_final_positions(pool):
+    mated = pool.evaluate(chess.Board(MATED), timeout=10)
+    assert mated.mate == 0 and mated.describe() == "Checkmate"
+    stalemate = pool.evaluate(chess.Board(STALEMATE), timeout=10)
+    assert stalemate.centipawns == 0 and stalemate.best_move is None
+
+
+def test_cache_persists_across_pools(tmp_path):
+    path = str(tmp_path / "evaluations.sqlite")
+    board = chess.Board()
+    board.push_san("e4")
+    first = EnginePool(STUB, workers=1, depth=1, cache=SqliteBackend(path))
+    try:
+        evaluation = first.evaluate(board, timeout=10)
+    finally:
+        first.close()
+    second = EnginePool(STUB, workers=1, depth=1, cache=SqliteBackend(path))
+    try:
+        assert second.cached(board) == evaluation
+        assert second.cached(board, depth=2) is None
+    finally:
+        second.close()
+
+
+def test_cancelled_batch_leaves_shared_evaluations_alone(pool):
+    boards = random_boards(40, seed=2)
+    busy = [pool.submit(board) for board in random_boards(30, seed=4)]  # keeps both engines busy
+    shared = pool.submit(boards[-1])  # another session waiting on the same position
+
+    def stop(done, total):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        pool.evaluate_many(boards, on_progress=stop)
+    assert shared.result(timeout=10) is not None
+    assert all(future.result(timeout=10) for future in busy)
+
+
+def test_batch_counts_only_its_own_analyses(pool):
+    boards = random_boards(20, seed=3)
+    others = [pool.submit(board) for board in boards[:5]]
+    analysed = pool.evaluate_many(boards)
+    assert all(future.done() for future in others)
+    assert analysed == len({position_key(board) for board in boards[5:]} - {position_key(b) for b in boards[:5]})
+
+
+def test_stub_engine_starts_from_any_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pool = EnginePool(STUB, workers=1, depth=1, cache=SqliteBackend(str(tmp_path / "evaluations.sqlite")))
+    try:
+        assert pool.name == "openings-stub"
+    finally:
+        pool.close()
@@ -0,0 +1,60 @@
+import chess
+import pytest
+
+from openings.export import IncrementalPgn, game_from_moves
+from openings.history import MoveHistory
+
+from .test_history import random_moves
+
+HEADERS = {"Event": "Test", "Site": "Here", "Date": "2024.01.01", "Round": "1", "White": "A", "Black": "B",
+           "Result": "*"}
+
+
+def expected_pgn(history, start=None):
+    return str(game_from_moves(history.moves, HEADERS, board=start))
+
+
+def test_render_matches_a_full_rebuild_while_the_game_grows():
+    pgn = IncrementalPgn()
+    history = MoveHistory()
+    for move in random_moves(60, 1):
+        history.push(move)
+        assert pgn.render(history, HEADERS) == expected_pgn(history)
+    assert pgn.render(history, HEADERS) is pgn.render(history, HEADERS)  # memoised
+
+
+def test_render_after_truncation_and_branching():
+    pgn = IncrementalPgn()
+    history = MoveHistory()
+    history.extend(random_moves(40, 2))
+    pgn.render(history, HEADERS)
+    history.jump(17)
+    history.push(next(iter(history.board.legal_moves)))
+    assert pgn.render(history, HEADERS) == expected_pgn(history)
+    history.jump(0)
+    history.push_san("d4")
+    assert pgn.render(history, HEADERS) == expected_pgn(history)
+
+
+@pytest.mark.parametrize("fen", [
+    "4k3/8/8/8/8/8/4P3/4K3 w - - 0 1",
+    "4k3/4p3/8/8/8/8/4P3/4K3 b - - 0 12",
+])
+def test_render_from_a_custom_start(fen):
+    start = chess.Board(fen)
+    pgn = IncrementalPgn()
+    history = MoveHistory(start)
+    for _ in range(5):
+        history.push(sorted(history.board.legal_moves, key=lambda move: move.uci())[0])
+        assert pgn.render(history, HEADERS) == expected_pgn(history, start)
+
+
+def test_a_new_history_is_never_served_the_previous_pgn():
+    pgn = IncrementalPgn()
+    first = MoveHistory()
+    first.push_san("e4")
+    text = pgn.render(first, HEADERS)
+    second = MoveHistory()
+    second.push_san("d4")
+    assert pgn.render(second, HEADERS) != text
+    assert pgn.render(second, HEADERS) == expected_pgn(second)
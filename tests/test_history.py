@@ -0,0 +1,87 @@
+import random
+
+import chess
+import pytest
+
+from openings.history import SNAPSHOT_EVERY, MoveHistory
+
+
+def random_moves(count, seed):
+    rng = random.Random(seed)
+    board, moves = chess.Board(), []
+    while len(moves) < count:
+        legal = list(board.legal_moves)
+        if not legal:
+            board, moves = chess.Board(), []
+            continue
+        moves.append(rng.choice(legal))
+        board.push(moves[-1])
+    return moves
+
+
+def board_after(moves, ply, start=None):
+    board = start.copy() if start is not None else chess.Board()
+    for move in moves[:ply]:
+        board.push(move)
+    return board
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_jump_and_back_across_snapshots(seed):
+    moves = random_moves(SNAPSHOT_EVERY * 4 + 3, seed)
+    history = MoveHistory()
+    history.extend(moves)
+    assert history.at_end and history.board.fen() == board_after(moves, len(moves)).fen()
+    rng = random.Random(seed)
+    for ply in [0, SNAPSHOT_EVERY, SNAPSHOT_EVERY - 1, SNAPSHOT_EVERY + 1, len(moves), 5] + [
+            rng.randrange(len(moves) + 1) for _ in range(20)]:
+        history.jump(ply)
+        assert history.cursor == ply
+        assert history.board.fen() == board_after(moves, ply).fen()
+    history.jump(SNAPSHOT_EVERY * 2 + 1)
+    for ply in range(SNAPSHOT_EVERY * 2, SNAPSHOT_EVERY - 2, -1):
+        history.back()
+        assert history.board.fen() == board_after(moves, ply).fen()
+        assert history.last_move == (moves[ply - 1] if ply else None)
+
+
+def test_jump_is_clamped():
+    history = MoveHistory()
+    history.extend(random_moves(5, 0))
+    history.jump(99)
+    assert history.cursor == 5
+    history.jump(-3)
+    assert history.cursor == 0
+    history.back()
+    assert history.cursor == 0
+
+
+def test_push_after_back_truncates_across_a_snapshot():
+    moves = random_moves(SNAPSHOT_EVERY * 2 + 5, 7)
+    history = MoveHistory()
+    history.extend(moves)
+    version = history.version
+    history.jump(SNAPSHOT_EVERY - 3)
+    branch = [move for move in history.board.legal_moves if move != moves[SNAPSHOT_EVERY - 3]][0]
+    history.push(branch)
+    assert history.version > version
+    expected = moves[:SNAPSHOT_EVERY - 3] + [branch]
+    assert history.moves == expected and len(history) == len(expected) and history.at_end
+    assert history.sans == [board_after(expected, ply).san(move) for ply, move in enumerate(expected)]
+    history.jump(0)
+    history.jump(len(expected))
+    assert history.board.fen() == board_after(expected, len(expected)).fen()
+    assert history.sans_from(len(expected) - 1) == history.sans[-1:]
+    assert history.sans_from(len(expected)) == []
+
+
+def test_custom_start_and_san_errors():
+    start = chess.Board("4k3/8/8/8/8/8/4P3/4K3 w - - 0 1")
+    history = MoveHistory(start)
+    history.push_san("e4")
+    history.push_san("Kd7")
+    assert history.sans == ["e4", "Kd7"]
+    with pytest.raises(chess.IllegalMoveError):
+        history.push_san("e6")
+    history.jump(0)
+    assert history.board.fen() == start.fen()
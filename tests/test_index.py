@@ -0,0 +1,62 @@
+import chess
+
+from openings.classifier import OpeningClassifier
+from openings.index import OpeningIndex, position_key, tokenize_moves
+
+
+def test_tokenize_drops_numbers_and_results():
+    assert tokenize_moves("1. e4 c5 2.Nf3 d6 3... Nc6 1-0") == ["e4", "c5", "Nf3", "d6", "Nc6"]
+
+
+def test_transposition_reaches_the_same_node(index):
+    board = chess.Board()
+    for san in ["Nf3", "d5", "d4"]:
+        board.push_san(san)
+    node = index.node(board)
+    assert node is not None and node.depth == 3
+    assert index.openings_at(board) == [4]  # 1. d4 d5 2. Nf3 ends here
+    assert index.node(position_key(board)) is node
+    assert node.lines == [4]
+    board.pop()
+    assert index.node(board).lines == [5]
+
+
+def test_children_and_lines_through_a_position(index):
+    board = chess.Board()
+    board.push_san("e4")
+    node = index.node(board)
+    assert sorted(san for san, _ in node.children.values()) == ["c5", "e5"]
+    assert node.lines == [0, 1, 2]
+    assert node.openings == []
+
+
+def test_invalid_line_is_truncated_with_an_error():
+    index = OpeningIndex()
+    line = index.add_line(0, "1. e4 e5 2. Ke3")
+    assert line.sans == ["e4", "e5"] and len(line.fens) == 3
+    assert "Ke3" in line.error
+    assert index.invalid_lines() == [line]
+
+
+def test_classifier_labels_every_ply(classifier):
+    labels = classifier.label_moves(["e4", "c5", "Nf3", "g6", "Bc4"])
+    assert labels == [None, None, 0, 0, 1, 1]
+    assert classifier.classify_game(["d4", "d5", "Nf3"]) == 4
+    assert classifier.classify_game(["Nf3", "d5", "d4"]) == 4  # by transposition
+    assert classifier.classify_game(["h4"]) is None
+
+
+def test_classifier_from_a_custom_start(classifier):
+    start = chess.Board("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1")
+    labels = classifier.label_moves(["c5", "Nf3", "g6"], board=start)
+    assert labels == [None, 0, 0, 1]
+    assert start.fen() == "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"  # not modified
+    away = chess.Board("4k3/8/8/8/8/8/8/4K3 w - - 0 1")
+    assert classifier.classify_game([chess.Move.from_uci("e1e2")], board=away) is None
+
+
+def test_prefers_the_longest_line_ending_in_a_position(catalogue_df):
+    df = catalogue_df.copy()
+    df.loc[len(df)] = ["D02", "Zukertort transposed", "1. Nf3 d5 2. d4", ""]
+    index = OpeningIndex.from_dataframe(df)
+    assert OpeningClassifier(index).classify_game(["d4", "d5", "Nf3"]) == 4  # equal length: first row wins
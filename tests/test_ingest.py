@@ -0,0 +1,75 @@
+import io
+
+import chess
+
+from openings.codec import pack_move
+from openings.explorer import OpeningExplorer
+from openings.index import position_key
+from openings.ingest import GameTree, IngestReport, ingest_pgn
+
+from .conftest import GAMES
+
+
+def test_prune_keeps_exactly_half_when_counts_tie():
+    tree = GameTree()
+    for code in range(101):
+        tree.add(1, code, 0)
+    tree.prune(max_moves=100)
+    assert len(tree) == 50
+    assert sorted(pair & 0xFFFF for pair in tree.slots) == list(range(50))  # ties go to the lower pair
+    assert all(counts == (1, 0, 0, 0) for _, _, counts in tree.items())
+
+
+def test_prune_keeps_the_most_played_pairs():
+    tree = GameTree()
+    for code in range(101):
+        tree.add(7, code, 1, games=3 if code % 10 == 0 else 1)
+    tree.prune(max_moves=100)
+    assert len(tree) == 50
+    assert {pair & 0xFFFF for pair in tree.slots} >= set(range(0, 101, 10))
+
+
+def test_prune_below_the_limit_keeps_everything():
+    tree = GameTree()
+    for code in range(10):
+        tree.add(1, code, 0)
+    tree.prune(max_moves=10)
+    assert len(tree) == 10
+
+
+def test_merge_adds_counts():
+    key = position_key(chess.Board())
+    e4 = chess.Move.from_uci("e2e4")
+    ours, theirs = GameTree(), GameTree()
+    code = pack_move(e4)
+    ours.add(key, code, 0)
+    theirs.add(key, code, 0)
+    theirs.add(key, code, 1)
+    ours.merge(theirs)
+    assert len(ours) == 1
+    assert ours.get(key, e4) == (2, 1, 0, 0)
+    assert ours.get(key, chess.Move.from_uci("d2d4")) is None
+
+
+def test_ingest_labels_results_and_explorer_counts(catalogue_df, classifier, pgn_bytes):
+    report = ingest_pgn(io.BytesIO(pgn_bytes), classifier, catalogue_df, explorer_plies=4)
+    assert report.games == 3 and report.errors == 0
+    assert report.openings[("B20", "Sicilian Defense")] == 1
+    assert report.results[("B27", "Sicilian Defense: Hyperaccelerated Fianchetto", "0-1")] == 1
+    # 1. Nf3 d5 2. d4 transposes into the Zukertort Variation of the Queen's Pawn Game
+    assert report.openings[("D02", "Queen's Pawn Game: Zukertort Variation")] == 1
+    explorer = OpeningExplorer(classifier.index, report.tree)
+    first = {c.san: c for c in explorer.continuations(chess.Board())}
+    assert (first["e4"].games, first["e4"].white, first["e4"].black) == (2, 1, 1)
+    assert (first["Nf3"].games, first["Nf3"].draws) == (1, 1)
+    assert first["d4"].games == 0 and first["d4"].lines == 2
+
+
+def test_merged_reports_match_one_pass(catalogue_df, classifier, pgn_bytes):
+    whole = ingest_pgn(io.BytesIO(pgn_bytes), classifier, catalogue_df, explorer_plies=4)
+    parts = IngestReport()
+    for game in GAMES:
+        parts.merge(ingest_pgn(io.BytesIO(game.encode()), classifier, catalogue_df, explorer_plies=4))
+    assert parts.openings == whole.openings and parts.results == whole.results
+    assert sorted((k, m.uci(), c) for k, m, c in parts.tree.items()) == sorted(
+        (k, m.uci(), c) for k, m, c in whole.tree.items())
@@ -0,0 +1,24 @@
+import time
+
+from openings.instrumentation import MetricsRegistry, RerunProfiler
+
+
+def test_nested_sections_are_not_counted_twice():
+    profiler = RerunProfiler()
+    with profiler.section("outer"):
+        time.sleep(0.02)
+        with profiler.section("inner"):
+            time.sleep(0.05)
+    profiler.finish()
+    assert profiler.sections["inner"] >= 0.05
+    assert 0.02 <= profiler.sections["outer"] < 0.05
+    assert sum(profiler.sections.values()) <= profiler.total
+
+
+def test_metrics_file_writes_are_throttled(tmp_path):
+    registry = MetricsRegistry()
+    registry.record(RerunProfiler())
+    path = str(tmp_path / "dashboard.prom")
+    assert registry.write_prometheus(path, min_interval=60)
+    assert not registry.write_prometheus(path, min_interval=60)
+    assert registry.write_prometheus(path)
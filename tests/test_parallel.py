@@ -0,0 +1,46 @@
+from openings import parallel
+from openings.catalogue import open_catalogue
+from openings.classifier import OpeningClassifier
+from openings.ingest import ingest_pgn
+from openings.parallel import ParallelPgnAnalyser, split_pgn
+
+from .conftest import GAMES
+
+
+def report_state(report):
+    return (report.games, report.errors, report.skipped, report.plies, report.openings, report.results,
+            sorted((key, move.uci(), tuple(counts)) for key, move, counts in report.tree.items()))
+
+
+def test_split_aligns_every_chunk_to_a_game(tmp_path, monkeypatch):
+    path = tmp_path / "games.pgn"
+    path.write_text("\n".join(GAMES * 50))
+    monkeypatch.setattr(parallel, "MIN_CHUNK_BYTES", 256)
+    ranges = split_pgn(str(path), 8)
+    data = path.read_bytes()
+    assert len(ranges) == 8
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert all(data[start:start + 1] == b"[" for start, _ in ranges)
+
+
+def test_parallel_classify_matches_serial(tmp_path, monkeypatch, catalogue_df):
+    csv_path = tmp_path / "openings.csv"
+    catalogue_df.to_csv(csv_path, index=False)
+    pgn_path = tmp_path / "games.pgn"
+    pgn_path.write_text("\n".join(GAMES * 40))
+    catalogue = open_catalogue(str(csv_path))
+    with open(pgn_path, "rb") as handle:
+        serial = ingest_pgn(handle, OpeningClassifier(catalogue.opening_index()), catalogue.frame(), explorer_plies=4)
+
+    monkeypatch.setattr(parallel, "MIN_CHUNK_BYTES", 512)
+    analyser = ParallelPgnAnalyser(str(csv_path), max_workers=2)
+    try:
+        progress = []
+        report = analyser.analyse(str(pgn_path), on_progress=lambda games, fraction: progress.append(fraction),
+                                  explorer_plies=4)
+    finally:
+        analyser.shutdown()
+    assert len(progress) > 1 and progress[-1] == 1
+    assert report_state(report) == report_state(serial)
+    assert report.games == len(GAMES) * 40
@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+from openings import validate
+from openings.validate import ERROR, INFO, WARNING, validate_catalogue
+
+ROWS = [
+    ("D00", "Queen's Pawn Game", "1. d4 d5"),                      # 0: clean
+    ("D02", "Zukertort Variation", "1. d4 d5 2. Nf3"),             # 1: clean
+    ("A00", "Garbage", "1. e4 xyz"),                               # 2: invalid
+    ("C20", "King walk", "1. e4 e5 2. Ke3"),                       # 3: illegal
+    ("D00", "Which knight", "1. d4 d5 2. Nf3 e6 3. Nd2"),          # 4: ambiguous
+    ("A00", "Nothing", ""),                                        # 5: empty
+    ("C20", "Skipped number", "1. e4 e5 3. Nf3"),                  # 6: numbering
+    ("A04", "Check that is not", "1. Nf3+ d5"),                   # 7: notation
+    ("D00", "Queen's Pawn Game", "1. d4 d5"),                      # 8: duplicate of 0
+    ("D00", "Another name", "1. d4 d5"),                           # 9: duplicate_line of 0
+    ("A06", "Zukertort into D02", "1. Nf3 d5 2. d4"),              # 10: transposition to 1
+]
+
+EXPECTED = {
+    2: (ERROR, "invalid"),
+    3: (ERROR, "illegal"),
+    4: (ERROR, "ambiguous"),
+    5: (ERROR, "empty"),
+    6: (WARNING, "numbering"),
+    7: (WARNING, "notation"),
+    8: (WARNING, "duplicate"),
+    9: (WARNING, "duplicate_line"),
+    10: (INFO, "transposition"),
+}
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame([{"ECO": eco, "Name": name, "Moves": moves} for eco, name, moves in ROWS])
+
+
+def findings(result):
+    return {issue.row: (issue.severity, issue.kind) for issue in result.issues}
+
+
+def test_each_finding_kind(frame):
+    result = validate_catalogue(frame, workers=1)
+    assert findings(result) == EXPECTED
+    assert len(result.issues) == len(EXPECTED)
+    assert result.errors == 4 and result.count(WARNING) == 4 and result.count(INFO) == 1
+    assert list(result.issues_frame().columns) == ["Row", "Severity", "Kind", "Detail"]
+
+
+def test_normalised_and_cleaned_frames(frame):
+    result = validate_catalogue(frame, workers=1)
+    normalised = result.normalised_frame()
+    assert normalised["Moves"][7] == "1. Nf3 d5"
+    assert normalised["UCI"][10] == "g1f3 d7d5 d2d4"
+    assert normalised["FEN"][10].split()[:4] == normalised["FEN"][1].split()[:4]  # clocks differ
+    cleaned = result.cleaned()
+    assert cleaned["Name"].tolist() == [ROWS[row][1] for row in (0, 1, 6, 7, 9, 10)]
+
+
+def test_parallel_validation_matches_serial(frame, monkeypatch):
+    serial = validate_catalogue(frame, workers=1)
+    monkeypatch.setattr(validate, "PARALLEL_ROWS", 1)
+    result = validate_catalogue(frame, workers=2)
+    assert sorted(map(repr, result.issues)) == sorted(map(repr, serial.issues))
+    assert result.lines == serial.lines